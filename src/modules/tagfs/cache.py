@@ -19,75 +19,394 @@
 #
 
 import time
-import functools
+import sys
+import threading
+import weakref
 
-class NoCacheStrategy(object):
-    """This cache strategy reloads the cache on every call.
+class GenerationReloadStrategy(object):
+    """This cache strategy reloads the cache when the generation of the data
+    the cached value is derived from has changed.
+
+    @param getGeneration: Returns the current generation for an object.
+    """
+
+    def __init__(self, getGeneration):
+        self.getGeneration = getGeneration
+
+    def getStamp(self, obj):
+        return self.getGeneration(obj)
+
+class StatReloadStrategy(object):
+    """This cache strategy reloads the cache when a file's mtime, size or
+    inode has changed.
+
+    The file is stat'ed at most once per interval and object. All cached
+    properties of an object which share a StatReloadStrategy also share the
+    stat result.
+
+    @param getStat: Returns the stat result of an object's file or None if
+    the file does not exist.
+    @param getInterval: Returns the minimal number of seconds between two
+    stat calls for an object. None disables the revalidation so the file is
+    only stat'ed once.
+    """
+
+    def __init__(self, getStat, getInterval, now = time.time):
+        self.getStat = getStat
+        self.getInterval = getInterval
+        self.now = now
+        self.stateName = '_statReloadState%x' % id(self)
+
+    def getFileStat(self, obj):
+        """Returns the (possibly rate limited) stat result of obj's file.
+        """
+
+        d = obj.__dict__
+        state = d.get(self.stateName)
+
+        if not state is None:
+            checkTime, stat = state
+            interval = self.getInterval(obj)
+
+            if interval is None:
+                return stat
+
+            now = self.now()
+
+            if now - checkTime < interval:
+                return stat
+        else:
+            now = self.now()
+
+        stat = self.getStat(obj)
+
+        d[self.stateName] = (now, stat)
+
+        return stat
+
+    def getStamp(self, obj):
+        stat = self.getFileStat(obj)
+
+        if stat is None:
+            return None
+
+        return (stat.st_mtime, stat.st_size, stat.st_ino)
+
+    def reset(self, obj):
+        """Forces a new stat call on the next access.
+        """
+
+        obj.__dict__.pop(self.stateName, None)
+
+class CacheStatistics(object):
+    """Counters which describe how well a cache performs.
+
+    time is the number of seconds spent for calculating the missing values.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.time = 0.0
+
+        # returns the number of currently cached values
+        self.getEntries = lambda: 0
+
+    @property
+    def entries(self):
+        return self.getEntries()
+
+# maps the cache names to their CacheStatistics
+statistics = {}
+
+# cached properties only collect statistics when enabled as counting the cache
+# hits makes every access more expensive
+statisticsEnabled = False
+
+def enableStatistics():
+    """Enables collecting statistics for cached properties.
+
+    Has to be called before any cached property is accessed.
     """
-    
-    def isCacheValid(self, f, *args, **kwargs):
-        return False
-    
-class NoReloadStrategy(object):
-    """This cache strategy never reloads the cache.
+
+    global statisticsEnabled
+
+    statisticsEnabled = True
+
+def getStatistics(name):
+    """Returns the CacheStatistics for a cache name.
+
+    The statistics are created if they don't exist yet.
     """
-    
-    def isCacheValid(self, f, *args, **kwargs):
-        return True
-
-class TimeoutReloadStrategy(object):
-    
-    def __init__(self, timeoutDuration = 10 * 60):
-        self.timeoutDuration = timeoutDuration
-    
-    def isCacheValid(self, f, *args, **kwargs):
-        obj = args[0]
-        
-        timestampFieldName = '__' + f.__name__ + 'Timestamp'
-        now = time.time()
-    
-        if not hasattr(obj, timestampFieldName):
-            setattr(obj, timestampFieldName, now)
-        
-            return False
-    
-        lastTime = getattr(obj, timestampFieldName)
-    
-        if now - lastTime < self.timeoutDuration:
-            return True
-    
-        setattr(obj, timestampFieldName, now)
-    
-        return False
-
-
-def cache(f, reloadStrategy = NoReloadStrategy()):
-    """This annotation is used to cache the result of a method call.
-    
-    @param f: This is the wrapped function which's return value will be cached.
-    @param reload: This is the reload strategy. This function returns True when
-    the cache should be reloaded. Otherwise False.
-    @attention: The cache is never deleted. The first call initializes the
-    cache. The method's parameters just passed to the called method. The cache
-    is not evaluating the parameters.
+
+    s = statistics.get(name)
+
+    if s is None:
+        s = CacheStatistics(name)
+
+        statistics[name] = s
+
+    return s
+
+# cached properties are only safe for concurrent access when enabled as the
+# locking makes every calculation more expensive
+threadSafe = False
+
+def enableThreadSafety():
+    """Makes cached properties safe for access from multiple threads.
+
+    Has to be called before a second thread accesses any cached property.
     """
-    
-    @functools.wraps(f)
-    def cacher(*args, **kwargs):
-        obj = args[0]
-        
-        cacheMemberName = '__' + f.__name__ + 'Cache'
-        
-        # the reload(...) call has to be first as we always have to call the
-        # method. not only when there is a cache member available in the object.
-        if (not reloadStrategy.isCacheValid(f, *args, **kwargs)) or (not hasattr(obj, cacheMemberName)):
-            value = f(*args, **kwargs)
-            
-            setattr(obj, cacheMemberName, value)
-            
-            return value
-            
-        return getattr(obj, cacheMemberName)
-    
-    return cacher
 
+    global threadSafe
+
+    threadSafe = True
+
+class SingleFlight(object):
+    """Runs a calculation only once for concurrent callers.
+
+    Callers which ask for a key while another thread calculates it wait for
+    that calculation and get it's result instead of calculating it again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        # maps the keys to their running calculations
+        self.flights = {}
+
+    def run(self, key, f):
+        with self.lock:
+            flight = self.flights.get(key)
+
+            if flight is None:
+                flight = _Flight()
+
+                self.flights[key] = flight
+
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+
+            if flight.failed:
+                raise flight.error[0], flight.error[1], flight.error[2]
+
+            return flight.value
+
+        try:
+            flight.value = f()
+        except:
+            flight.failed = True
+            flight.error = sys.exc_info()
+
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+            flight.done.set()
+
+        return flight.value
+
+class _Flight(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+        self.error = None
+
+# coordinates the calculations of all cached properties
+singleFlight = SingleFlight()
+
+def getStampedName(name):
+    return '_' + name + 'Stamped'
+
+class cachedProperty(object):
+    """This annotation turns a method into a read only property which caches
+    it's value.
+
+    The value is stored in the object's __dict__ under the property's name.
+    As cachedProperty is a non-data descriptor the stored value shadows the
+    descriptor so later accesses are plain attribute lookups. The cached value
+    can be dropped via invalidate(...).
+
+    Properties created via withReloadStrategy(...) store the value together
+    with the reload strategy's stamp instead. The value is recalculated when
+    the stamp changes.
+    """
+
+    def __init__(self, f, reloadStrategy = None):
+        self.f = f
+        self.reloadStrategy = reloadStrategy
+        self.__name__ = f.__name__
+        self.__doc__ = f.__doc__
+        self.stampedName = getStampedName(f.__name__)
+        self._statistics = None
+        # the keys are the objects which cache a value. weakref.WeakSet is
+        # not available before python 2.7.
+        self._cachingObjects = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def withReloadStrategy(reloadStrategy):
+        def createCachedProperty(f):
+            return cachedProperty(f, reloadStrategy)
+
+        return createCachedProperty
+
+    def getStatistics(self, cls):
+        if self._statistics is None:
+            owner = cls
+
+            for c in cls.__mro__:
+                if c.__dict__.get(self.__name__) is self:
+                    owner = c
+
+                    break
+
+            self._statistics = getStatistics('%s.%s.%s' % (owner.__module__, owner.__name__, self.__name__))
+            self._statistics.getEntries = lambda: len(self._cachingObjects)
+
+        return self._statistics
+
+    def _lookup(self, obj, stamped, stamp):
+        """Returns the cached value as one element tuple or None if no value
+        is cached.
+        """
+
+        if not stamped:
+            if not self.__name__ in obj.__dict__:
+                return None
+
+            return (obj.__dict__[self.__name__], )
+
+        stampedValue = obj.__dict__.get(self.stampedName)
+        if stampedValue is None or stampedValue[0] != stamp:
+            return None
+
+        return (stampedValue[1], )
+
+    def _calculate(self, obj, cls, stamped, stamp):
+        if not threadSafe:
+            return self._calculateAndStore(obj, cls, stamped, stamp)
+
+        # concurrent misses for the same object and stamp calculate the value
+        # only once
+        return singleFlight.run((id(obj), self.__name__, stamp), lambda: self._lookupOrCalculate(obj, cls, stamped, stamp))
+
+    def _lookupOrCalculate(self, obj, cls, stamped, stamp):
+        # another thread may have stored the value after this thread missed
+        # it
+        cachedValue = self._lookup(obj, stamped, stamp)
+        if not cachedValue is None:
+            return cachedValue[0]
+
+        return self._calculateAndStore(obj, cls, stamped, stamp)
+
+    def _calculateAndStore(self, obj, cls, stamped, stamp):
+        # the value is stored before a single flight calculation ends. so
+        # threads which miss the value later find it.
+        value = self._measure(obj, cls)
+
+        if stamped:
+            obj.__dict__[self.stampedName] = (stamp, value)
+        else:
+            obj.__dict__[self.__name__] = value
+
+        return value
+
+    def _measure(self, obj, cls):
+        if not statisticsEnabled:
+            return self.f(obj)
+
+        start = time.time()
+        value = self.f(obj)
+
+        s = self.getStatistics(cls)
+        s.misses += 1
+        s.time += time.time() - start
+
+        try:
+            self._cachingObjects[obj] = True
+        except TypeError:
+            # obj can't be referenced weakly
+            pass
+
+        return value
+
+    def __get__(self, obj, cls = None):
+        if obj is None:
+            return self
+
+        if self.reloadStrategy is None:
+            if not statisticsEnabled:
+                return self._calculate(obj, type(obj), False, None)
+
+            # the value is stored like a stamped value so the hits can be
+            # counted
+            stamp = None
+        else:
+            # the stamp is fetched before the value is calculated. so a
+            # change while calculating the value causes another calculation
+            # later.
+            stamp = self.reloadStrategy.getStamp(obj)
+
+        stampedValue = obj.__dict__.get(self.stampedName)
+        if not stampedValue is None and stampedValue[0] == stamp:
+            if statisticsEnabled:
+                self.getStatistics(type(obj)).hits += 1
+
+            return stampedValue[1]
+
+        return self._calculate(obj, type(obj), True, stamp)
+
+    def discard(self, obj):
+        try:
+            self._cachingObjects.pop(obj, None)
+        except TypeError:
+            # obj can't be referenced weakly
+            pass
+
+def getCachedPropertyNames(cls):
+    """Returns the names of all cachedProperty attributes of a class and it's
+    base classes.
+    """
+
+    names = set()
+
+    for c in cls.__mro__:
+        for name, attr in c.__dict__.iteritems():
+            if isinstance(attr, cachedProperty):
+                names.add(name)
+
+    return names
+
+def invalidate(obj, *names):
+    """Drops cached property values of an object.
+
+    @param obj: The object which's cached values are dropped.
+    @param names: The names of the cached properties which are dropped. All
+    cached properties of obj are dropped when no names are passed.
+    """
+
+    cls = type(obj)
+
+    if len(names) == 0:
+        names = getCachedPropertyNames(cls)
+
+    d = obj.__dict__
+
+    for name in names:
+        d.pop(name, None)
+        d.pop(getStampedName(name), None)
+
+        if statisticsEnabled:
+            attr = getattr(cls, name, None)
+
+            if isinstance(attr, cachedProperty):
+                attr.discard(obj)
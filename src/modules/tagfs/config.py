@@ -27,6 +27,26 @@ def parseConfig(itemsDir):
             'tagFileName': '.tag',
             'enableValueFilters': 'False',
             'enableRootItemLinks': 'False',
+            'enableRecursionPruning': 'False',
+            'maxFilterDepth': '0',
+            'enableLiveReload': 'False',
+            'scanThreads': '0',
+            'enablePersistentIndex': 'False',
+            'tagFileCheckInterval': '0',
+            'enableCacheStatistics': 'False',
+            'pathCacheSize': '1000',
+            'missingPathCacheSize': '1000',
+            'filterCacheSize': '1000',
+            'attrTimeout': '1.0',
+            'entryTimeout': '1.0',
+            'negativeTimeout': '0.0',
+            'enableMultithreading': 'False',
+            # one week
+            'freebaseCacheTimeout': '604800',
+            'freebaseCacheSize': '10000',
+            'freebaseThreads': '8',
+            'freebaseTimeout': '30',
+            'freebaseFailureTimeout': '600',
             })
     config.add_section(Config.GLOBAL_SECTION)
 
@@ -58,6 +78,82 @@ class Config(object):
     def enableRootItemLinks(self):
         return self._config.getboolean(Config.GLOBAL_SECTION, 'enableRootItemLinks')
 
+    @property
+    def enableRecursionPruning(self):
+        return self._config.getboolean(Config.GLOBAL_SECTION, 'enableRecursionPruning')
+
+    @property
+    def maxFilterDepth(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'maxFilterDepth')
+
+    @property
+    def enableLiveReload(self):
+        return self._config.getboolean(Config.GLOBAL_SECTION, 'enableLiveReload')
+
+    @property
+    def scanThreads(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'scanThreads')
+
+    @property
+    def enablePersistentIndex(self):
+        return self._config.getboolean(Config.GLOBAL_SECTION, 'enablePersistentIndex')
+
+    @property
+    def tagFileCheckInterval(self):
+        return self._config.getfloat(Config.GLOBAL_SECTION, 'tagFileCheckInterval')
+
+    @property
+    def enableCacheStatistics(self):
+        return self._config.getboolean(Config.GLOBAL_SECTION, 'enableCacheStatistics')
+
+    @property
+    def pathCacheSize(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'pathCacheSize')
+
+    @property
+    def missingPathCacheSize(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'missingPathCacheSize')
+
+    @property
+    def filterCacheSize(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'filterCacheSize')
+
+    @property
+    def attrTimeout(self):
+        return self._config.getfloat(Config.GLOBAL_SECTION, 'attrTimeout')
+
+    @property
+    def entryTimeout(self):
+        return self._config.getfloat(Config.GLOBAL_SECTION, 'entryTimeout')
+
+    @property
+    def negativeTimeout(self):
+        return self._config.getfloat(Config.GLOBAL_SECTION, 'negativeTimeout')
+
+    @property
+    def enableMultithreading(self):
+        return self._config.getboolean(Config.GLOBAL_SECTION, 'enableMultithreading')
+
+    @property
+    def freebaseCacheTimeout(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'freebaseCacheTimeout')
+
+    @property
+    def freebaseCacheSize(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'freebaseCacheSize')
+
+    @property
+    def freebaseThreads(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'freebaseThreads')
+
+    @property
+    def freebaseTimeout(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'freebaseTimeout')
+
+    @property
+    def freebaseFailureTimeout(self):
+        return self._config.getint(Config.GLOBAL_SECTION, 'freebaseFailureTimeout')
+
     def __str__(self):
         #return '[' + ', '.join([field + ': ' + str(self.__dict__[field]) for field in ['tagFileName', 'enableValueFilters', 'enableRootItemLinks']]) + ']'
-        return '[tagFileName: %s, enableValueFilters: %s, enableRootItemLinks: %s]' % (self.tagFileName, self.enableValueFilters, self.enableRootItemLinks)
+        return '[tagFileName: %s, enableValueFilters: %s, enableRootItemLinks: %s, enableRecursionPruning: %s, maxFilterDepth: %s, enableLiveReload: %s, scanThreads: %s, enablePersistentIndex: %s, tagFileCheckInterval: %s, enableCacheStatistics: %s, pathCacheSize: %s, missingPathCacheSize: %s, filterCacheSize: %s, attrTimeout: %s, entryTimeout: %s, negativeTimeout: %s, enableMultithreading: %s, freebaseCacheTimeout: %s, freebaseCacheSize: %s, freebaseThreads: %s, freebaseTimeout: %s, freebaseFailureTimeout: %s]' % (self.tagFileName, self.enableValueFilters, self.enableRootItemLinks, self.enableRecursionPruning, self.maxFilterDepth, self.enableLiveReload, self.scanThreads, self.enablePersistentIndex, self.tagFileCheckInterval, self.enableCacheStatistics, self.pathCacheSize, self.missingPathCacheSize, self.filterCacheSize, self.attrTimeout, self.entryTimeout, self.negativeTimeout, self.enableMultithreading, self.freebaseCacheTimeout, self.freebaseCacheSize, self.freebaseThreads, self.freebaseTimeout, self.freebaseFailureTimeout)
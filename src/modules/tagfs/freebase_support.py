@@ -18,8 +18,12 @@
 
 import json
 import logging
+import os
+import threading
+import time
+from transient_dict import TransientDict
 
-def createFreebaseAdapter():
+def createFreebaseAdapter(system = None, cacheFileName = None, cacheTimeout = 0, cacheSize = 0, threads = 1, timeout = None, failureTimeout = 0):
     # freebase is an optional dependency. tagfs should execute even if it's not
     # available.
     try:
@@ -27,19 +31,42 @@ def createFreebaseAdapter():
 
         logging.info('freebase support enabled')
 
-        return FreebaseAdapter()
+        adapter = FreebaseAdapter()
     except ImportError:
         logging.warn('freebase support disabled')
 
         return FreebaseAdapterStub()
+
+    if not cacheFileName is None and cacheSize > 0:
+        adapter = CachingFreebaseAdapter(system, adapter, cacheFileName, cacheTimeout, cacheSize)
+        adapter.load()
+
+    return FreebaseExecutor(adapter, threads, timeout, failureTimeout)
     
 class FreebaseAdapterStub(object):
 
     def execute(self, *args, **kwargs):
         return {}
 
+    def prefetch(self, *args, **kwargs):
+        pass
+
+    def releasePrefetched(self):
+        pass
+
+    def save(self):
+        pass
+
+class FreebaseQueryFailed(Exception):
+
+    def __init__(self, key):
+        super(FreebaseQueryFailed, self).__init__('freebase query failed recently: %s' % key)
+
 class FreebaseAdapter(object):
 
+    def save(self):
+        pass
+
     def execute(self, query):
         import freebase
 
@@ -52,6 +79,233 @@ class FreebaseAdapter(object):
 
         return result
 
+class CachingFreebaseAdapter(object):
+    """Caches the results of another freebase adapter.
+
+    The results are keyed by the query's canonical JSON representation.
+    Results expire after cacheTimeout seconds. If the cache holds more than
+    cacheSize results the least recently used results are dropped. The cache
+    can be persisted so remounts don't have to execute the queries again.
+    """
+
+    VERSION = 2
+
+    def __init__(self, system, adapter, cacheFileName, cacheTimeout, cacheSize, now = time.time):
+        self.system = system
+        self.adapter = adapter
+        self.cacheFileName = cacheFileName
+        self.cacheTimeout = cacheTimeout
+        self.cacheSize = cacheSize
+        self.now = now
+
+        # maps the query keys to (timestamp, result) tuples
+        self.results = TransientDict(cacheSize)
+        self.dirty = False
+
+        # the adapter may be called from multiple threads
+        self.lock = threading.Lock()
+
+    def load(self):
+        if not self.system.pathExists(self.cacheFileName):
+            return
+
+        try:
+            with self.system.open(self.cacheFileName, 'r') as f:
+                data = json.load(f)
+
+            if data['version'] != CachingFreebaseAdapter.VERSION:
+                logging.info('Ignoring freebase cache %s with version %s', self.cacheFileName, data['version'])
+
+                return
+
+            # the least recently used results come first. so the results
+            # which exceed the cache's capacity are dropped.
+            for key, timestamp, result in data['results']:
+                self.results[key] = (timestamp, result)
+        except (IOError, ValueError, TypeError, KeyError), e:
+            logging.warn('Can\'t load freebase cache %s: %s', self.cacheFileName, e)
+
+            return
+
+        logging.debug('Loaded %s freebase results from cache %s', len(self.results), self.cacheFileName)
+
+    def save(self):
+        if not self.dirty:
+            return
+
+        tmpFileName = self.cacheFileName + '.tmp'
+
+        with self.lock:
+            results = [(key, timestamp, result) for key, (timestamp, result) in self.results.items()]
+
+        try:
+            with self.system.open(tmpFileName, 'w') as f:
+                json.dump({
+                        'version': CachingFreebaseAdapter.VERSION,
+                        'results': results,
+                        }, f, separators = (',', ':'))
+
+            os.rename(tmpFileName, self.cacheFileName)
+        except (IOError, OSError), e:
+            logging.warn('Can\'t save freebase cache %s: %s', self.cacheFileName, e)
+
+            return
+
+        self.dirty = False
+
+        logging.debug('Saved %s freebase results to cache %s', len(self.results), self.cacheFileName)
+
+    def execute(self, query):
+        key = query.cacheKey
+        now = self.now()
+
+        with self.lock:
+            cachedResult = self.results.lookup(key)
+            if not cachedResult is None:
+                timestamp, result = cachedResult
+
+                if now - timestamp < self.cacheTimeout:
+                    return result
+
+        # the lock is not held while freebase is queried
+        result = self.adapter.execute(query)
+
+        with self.lock:
+            self.results[key] = (now, result)
+            self.dirty = True
+
+        return result
+
+class FreebaseExecutor(object):
+    """Executes freebase queries through a bounded pool of worker threads.
+
+    prefetch de-duplicates the given queries and executes them
+    concurrently. The prefetched results are kept until releasePrefetched is
+    called so the items' tags can be built without waiting for freebase
+    again. Otherwise results are cached by the adapter within its configured
+    bounds. Queries which are already running are not executed again but
+    their results are shared. Every query is given timeout seconds to
+    complete. Failed queries are not executed again for failureTimeout
+    seconds.
+    """
+
+    def __init__(self, adapter, threads, timeout, failureTimeout, now = time.time):
+        self.adapter = adapter
+        # ThreadPool refuses to start without threads
+        self.threads = max(1, threads)
+        self.timeout = timeout
+        self.failureTimeout = failureTimeout
+        self.now = now
+
+        # maps the keys of the running queries to their async results
+        self.inFlight = {}
+
+        # maps the keys of the prefetched queries to their results
+        self.prefetchedResults = {}
+        self.failures = {}
+
+        self.lock = threading.Lock()
+        self._pool = None
+
+    @property
+    def pool(self):
+        with self.lock:
+            if self._pool is None:
+                from multiprocessing.pool import ThreadPool
+
+                self._pool = ThreadPool(self.threads)
+
+            return self._pool
+
+    def _hasFailed(self, key):
+        failureTime = self.failures.get(key)
+
+        if failureTime is None:
+            return False
+
+        if self.now() - failureTime < self.failureTimeout:
+            return True
+
+        self.failures.pop(key, None)
+
+        return False
+
+    def _submit(self, query):
+        key = query.cacheKey
+        pool = self.pool
+
+        with self.lock:
+            asyncResult = self.inFlight.get(key)
+
+            if asyncResult is None:
+                asyncResult = pool.apply_async(self.adapter.execute, (query, ))
+
+                self.inFlight[key] = asyncResult
+
+            return asyncResult
+
+    def _wait(self, query, asyncResult):
+        key = query.cacheKey
+
+        try:
+            return asyncResult.get(self.timeout)
+        except Exception as e:
+            logging.error('Failed to execute freebase query %s: %s', key, repr(e))
+
+            self.failures[key] = self.now()
+
+            return None
+        finally:
+            with self.lock:
+                if self.inFlight.get(key) is asyncResult:
+                    del self.inFlight[key]
+
+    def prefetch(self, queries):
+        pendingKeys = set()
+        pendingQueries = []
+
+        for query in queries:
+            key = query.cacheKey
+
+            if key in pendingKeys or key in self.prefetchedResults or self._hasFailed(key):
+                continue
+
+            pendingKeys.add(key)
+            pendingQueries.append((query, self._submit(query)))
+
+        logging.info('Executing %s freebase queries', len(pendingQueries))
+
+        for query, asyncResult in pendingQueries:
+            result = self._wait(query, asyncResult)
+
+            if not result is None:
+                self.prefetchedResults[query.cacheKey] = result
+
+    def releasePrefetched(self):
+        """Drops the prefetched results.
+        """
+
+        self.prefetchedResults = {}
+
+    def execute(self, query):
+        key = query.cacheKey
+
+        result = self.prefetchedResults.get(key)
+        if not result is None:
+            return result
+
+        if self._hasFailed(key):
+            raise FreebaseQueryFailed(key)
+
+        result = self._wait(query, self._submit(query))
+        if result is None:
+            raise FreebaseQueryFailed(key)
+
+        return result
+
+    def save(self):
+        self.adapter.save()
+
 class Query(object):
 
     def __init__(self, queryObject):
@@ -69,6 +323,17 @@ class Query(object):
 
         return q
 
+    @property
+    def cacheKey(self):
+        """Canonical representation of this query.
+
+        Queries which select the same data have the same cache key. The key
+        is built from the query object as freebaseQuery doesn't distinguish
+        selected keys from keys which are matched against empty lists.
+        """
+
+        return json.dumps(self.queryObject, sort_keys = True, separators = (',', ':'))
+
     @property
     def queryString(self):
         # TODO this func is only used in tests => remove
@@ -18,45 +18,85 @@
 
 import logging
 import os
+import threading
 import time
 import traceback
+import weakref
 
-from cache import cache
+from cache import cachedProperty, invalidate, getStatistics, StatReloadStrategy
+from item_facets import Facets
+from item_index import ItemIndex
+from transient_dict import SynchronizedTransientDict
 import sysIO
 import freebase_support
 
+def _intern(s):
+    # only byte strings can be interned
+    if type(s) is str:
+        return intern(s)
+
+    return s
+
 class Tag(object):
+    """A context/value pair which has been assigned to an item.
+
+    Tags are immutable flyweights. Creating a Tag returns the already
+    existing instance for the same context and value as long as it is in use.
+    """
+
+    __slots__ = ('context', 'value', '_hash', '__weakref__')
+
+    _pool = weakref.WeakValueDictionary()
     
-    def __init__(self, value, context = None):
-        if context == None:
-            self.context = None
-        else:
-            self.context = context.strip()
-        
-        self.value = value.strip()
+    def __new__(cls, value, context = None):
+        if not context == None:
+            context = _intern(context.strip())
+
+            if len(context) == 0:
+                # we don't allow empty strings as they can't be represented as
+                # a directory very well
+                raise ValueError()
+
+        value = _intern(value.strip())
         
-        if not self.context == None and len(self.context) == 0:
+        if len(value) == 0:
             # we don't allow empty strings as they can't be represented as a
             # directory very well
             raise ValueError()
 
-        if len(self.value) == 0:
-            # we don't allow empty strings as they can't be represented as a
-            # directory very well
-            raise ValueError()
+        key = (context, value)
+
+        tag = cls._pool.get(key)
+        if tag is None:
+            tag = object.__new__(cls)
+            tag.context = context
+            tag.value = value
+            tag._hash = key.__hash__()
+
+            cls._pool[key] = tag
+
+        return tag
         
     def __hash__(self):
-        return (self.context, self.value).__hash__()
+        return self._hash
     
     def __eq__(self, other):
+        if self is other:
+            return True
+
         return self.value == other.value and self.context == other.context
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
         
     def __repr__(self):
         return '<Tag %s: %s>' % (self.context, self.value)
 
-def parseTagsFromFile(system, tagFileName):
+def parseTagsFromFile(system, tagFileName, tagFileStat = None):
     """Parses the tags from the specified file.
     
+    @param tagFileStat: The tag file's stat result if it's already known.
+    Parsing does not need it but replacements like the tag file cache do.
     @return: The parsed values are returned as a set containing Tag objects.
     @see: Tag
     """
@@ -92,26 +132,34 @@ class NoSuchTagValue(Exception):
 
     pass
 
+def statTagFile(item):
+    try:
+        return item.system.stat(item._tagFileName)
+    except OSError:
+        return None
+
+# the tags are parsed again when the tag file changed. how often the tag file
+# is checked for changes is configured in the item access.
+tagFileReloadStrategy = StatReloadStrategy(statTagFile, lambda item: item.itemAccess.tagFileCheckInterval)
+
 class Item(object):
     
     def __init__(self, name, system, itemAccess, freebaseQueryParser, freebaseAdapter, genericFreebaseQueries = [], parseTagsFromFile = parseTagsFromFile):
         self.name = name
         self.system = system
         self.itemAccess = itemAccess
+        # the id is assigned by the item access
+        self.id = None
         self.freebaseQueryParser = freebaseQueryParser
         self.freebaseAdapter = freebaseAdapter
         self.parseTagsFromFile = parseTagsFromFile
         self.genericFreebaseQueries = genericFreebaseQueries
         
-        # TODO register at file system to receive tag file change events.
-        
-    @property
-    @cache
+    @cachedProperty
     def itemDirectory(self):
         return os.path.join(self.itemAccess.dataDirectory, self.name)
     
-    @property
-    @cache
+    @cachedProperty
     def _tagFileName(self):
         """Returns the name of the tag file for this item.
         """
@@ -119,9 +167,20 @@ class Item(object):
         return os.path.join(self.itemDirectory, self.itemAccess.tagFileName)
 
     @property
-    @cache
+    def _tagFileStat(self):
+        """Returns the stat result of the tag file or None if the tag file
+        can't be accessed.
+
+        The stat result is shared by all properties which need information
+        about the tag file so the file is only stat'ed once per check
+        interval.
+        """
+
+        return tagFileReloadStrategy.getFileStat(self)
+
+    @property
     def tagFileExists(self):
-        return self.system.pathExists(self._tagFileName)
+        return not self._tagFileStat is None
 
     def __getFreebaseTags(self, query):
         try:
@@ -133,10 +192,17 @@ class Item(object):
         except Exception as e:
             logging.error('Failed to execute freebase query %s: %s', query, e)
     
+    @cachedProperty.withReloadStrategy(tagFileReloadStrategy)
+    def _fileTags(self):
+        """Returns the tags as they are written in the tag file.
+
+        Freebase queries are not executed.
+        """
+
+        return list(self.parseTagsFromFile(self.system, self._tagFileName, self._tagFileStat))
+
     def __parseTags(self):
-        tagFileName = self._tagFileName
-        
-        for rawTag in self.parseTagsFromFile(self.system, tagFileName):
+        for rawTag in self._fileTags:
             if(rawTag.context == '_freebase'):
                 query = self.freebaseQueryParser.parse(rawTag.value)
                 
@@ -145,16 +211,47 @@ class Item(object):
             else:
                 yield rawTag
 
+    def __createGenericQueries(self, tags):
+        def getValue(context):
+            for tag in tags:
+                if(tag.context == context):
+                    return tag.value
+
+            raise NoSuchTagValue()
+
+        queryFactory = freebase_support.GenericQueryFactory(getValue)
+        for genericQuery in self.genericFreebaseQueries:
+            try:
+                yield freebase_support.Query(queryFactory.createQuery(genericQuery.queryObject))
+            except NoSuchTagValue:
+                pass
+
+    @property
+    def freebaseQueries(self):
+        """Returns the freebase queries which are known without executing
+        any freebase query.
+
+        The queries can be prefetched before the item's tags are built.
+        """
+
+        if not self.tagFileExists:
+            return
+
+        for rawTag in self._fileTags:
+            if(rawTag.context == '_freebase'):
+                yield self.freebaseQueryParser.parse(rawTag.value)
+
+        for query in self.__createGenericQueries(self._fileTags):
+            yield query
+
     @property
-    @cache
     def tagsCreationTime(self):
         if not self.tagFileExists:
             return None
 
-        return os.path.getctime(self._tagFileName)
+        return self._tagFileStat.st_ctime
     
     @property
-    @cache
     def tagsModificationTime(self):
         """Returns the last time when the tags have been modified.
         """
@@ -162,12 +259,13 @@ class Item(object):
         if not self.tagFileExists:
             return None
 
-        return os.path.getmtime(self._tagFileName)
+        return self._tagFileStat.st_mtime
     
-    @property
-    @cache
+    @cachedProperty.withReloadStrategy(tagFileReloadStrategy)
     def tags(self):
         """Returns the tags as a list for this item.
+
+        The tags are parsed again after the tag file changed.
         """
         
         if not self.tagFileExists:
@@ -175,22 +273,11 @@ class Item(object):
 
         tags = list(self.__parseTags())
 
-        def getValue(context):
-            for tag in tags:
-                if(tag.context == context):
-                    return tag.value
-
-            raise NoSuchTagValue()
-
-        queryFactory = freebase_support.GenericQueryFactory(getValue)
-        for genericQuery in self.genericFreebaseQueries:
-            try:
-                query = queryFactory.createQuery(genericQuery.queryObject)
-
-                for tag in self.__getFreebaseTags(freebase_support.Query(query)):
-                    tags.append(tag)
-            except NoSuchTagValue:
-                pass
+        # generic queries may refer to tags which have been added by
+        # previous generic queries
+        for query in self.__createGenericQueries(tags):
+            for tag in self.__getFreebaseTags(query):
+                tags.append(tag)
 
         return tags
 
@@ -242,6 +329,16 @@ class Item(object):
     @property
     def tagged(self):
         return self.tagFileExists
+
+    def invalidateTags(self):
+        """Drops the cached tag file information.
+
+        The tag file is stat'ed and parsed again on the next access.
+        """
+
+        tagFileReloadStrategy.reset(self)
+
+        invalidate(self, '_fileTags', 'tags')
     
     def __repr__(self):
         return '<Item %s, %s>' % (self.name, self.tags)
@@ -250,28 +347,63 @@ class ItemAccess(object):
     """This is the access point to the Items.
     """
     
-    def __init__(self, system, dataDirectory, tagFileName, freebaseQueryParser, freebaseAdapter, genericFreebaseQueries):
+    def __init__(self, system, dataDirectory, tagFileName, freebaseQueryParser, freebaseAdapter, genericFreebaseQueries, scanThreads = 0, tagFileCache = None, tagFileCheckInterval = None, filterCacheSize = 1000):
         self.system = system
         self.dataDirectory = dataDirectory
         self.tagFileName = tagFileName
         self.freebaseQueryParser = freebaseQueryParser
         self.freebaseAdapter = freebaseAdapter
         self.genericFreebaseQueries = genericFreebaseQueries
+        self.scanThreads = scanThreads
+        self.tagFileCache = tagFileCache
+        self.tagFileCheckInterval = tagFileCheckInterval
         
         self.parseTime = 0
+        self.validationTime = 0
+
+        # the generation is incremented whenever the items change. values
+        # derived from the items are only valid for one generation.
+        self.generation = 0
+
+        # maps the item ids to the items. the ids of removed items are not
+        # reused. removed items stay in the table as readers of the previous
+        # index may still refer to them.
+        self.itemsById = []
+
+        # held while changed copies of the items and the index are prepared.
+        # readers never need it as the items and the index are replaced but
+        # never changed in place.
+        self.lock = threading.RLock()
+
+        # map (generation, filter key) to the filtered items and their
+        # facets. the values of older generations are never used again and
+        # get dropped over time.
+        self.filteredItemsCache = SynchronizedTransientDict(filterCacheSize, getStatistics('tagfs.item_access.ItemAccess.filteredItemsCache'))
+        self.facetCache = SynchronizedTransientDict(filterCacheSize, getStatistics('tagfs.item_access.ItemAccess.facetCache'))
         
+    def __createItem(self, itemName):
+        if self.tagFileCache is None:
+            return Item(itemName, self.system, self, self.freebaseQueryParser, self.freebaseAdapter, self.genericFreebaseQueries)
+
+        return Item(itemName, self.system, self, self.freebaseQueryParser, self.freebaseAdapter, self.genericFreebaseQueries, parseTagsFromFile = self.tagFileCache.parseTagsFromFile)
+
+    def __registerItem(self, item):
+        item.id = len(self.itemsById)
+
+        self.itemsById.append(item)
+
     def __parseItems(self):
         items = {}
         
         logging.debug('Start parsing items from dir: %s', self.dataDirectory)
         
-        for itemName in os.listdir(self.dataDirectory):
+        for itemName in self.system.listDirectories(self.dataDirectory):
             if itemName == '.tagfs':
                 # skip directory with configuration
                 continue
 
             try:
-                item = Item(itemName, self.system, self, self.freebaseQueryParser, self.freebaseAdapter, self.genericFreebaseQueries)
+                item = self.__createItem(itemName)
                 
                 items[itemName] = item
                 
@@ -281,38 +413,305 @@ class ItemAccess(object):
                               strerror)
                 
         logging.debug('Found %s items', len(items))
+
+        self.__loadItems(items)
+
+        for itemName in sorted(items.iterkeys()):
+            self.__registerItem(items[itemName])
         
         self.parseTime = time.time()
 
         return items
+
+    def __loadItem(self, item):
+        try:
+            if item.tagged:
+                # freebase queries are executed later in one batch
+                item._fileTags
+
+            return None
+        except IOError, (error, strerror):
+            logging.error('Can \'t read tags for item %s: %s',
+                          item.name,
+                          strerror)
+
+            return item.name
+
+    def __loadItemsConcurrently(self, items):
+        from multiprocessing.pool import ThreadPool
+
+        pool = ThreadPool(self.scanThreads)
+
+        try:
+            return list(pool.imap_unordered(self.__loadItem, items, 64))
+        finally:
+            pool.close()
+            pool.join()
+
+    def __loadItems(self, items):
+        """Stats and parses the tag files of all items.
+
+        The tag files are read concurrently if scanThreads is greater than 1.
+        Afterwards the items' tags are cached so building the index does not
+        touch the file system anymore. Items which tags can't be read are
+        removed.
+        """
+
+        logging.debug('Start loading items with %s threads', self.scanThreads)
+
+        if self.scanThreads > 1:
+            failedItemNames = self.__loadItemsConcurrently(items.values())
+        else:
+            failedItemNames = [self.__loadItem(item) for item in items.itervalues()]
+
+        for failedItemName in failedItemNames:
+            if not failedItemName is None:
+                del items[failedItemName]
+
+        logging.debug('Loaded %s items', len(items))
     
-    @property
-    @cache
+    @cachedProperty
     def items(self):
         return self.__parseItems() 
 
     @property
-    @cache
-    def tags(self):
-        tags = set()
-        
-        for item in self.items.itervalues():
-            if not item.tagged:
-                continue
-          
-            tags = tags | set(item.tags)
-            
-        return tags
-
-    @property
-    @cache
     def taggedItems(self):
-        return set([item for item in self.items.itervalues() if item.tagged])
+        return self.index.taggedItems
     
     @property
-    @cache
     def untaggedItems(self):
-        return set([item for item in self.items.itervalues() if not item.tagged])
+        return self.index.untaggedItems
+
+    @cachedProperty
+    def index(self):
+        prefetched = self.__prefetchFreebaseQueries(self.items.itervalues())
+
+        index = ItemIndex(self.itemsById)
+
+        try:
+            index.addItems(self.items.itervalues())
+        finally:
+            # the prefetched results are only needed to build the items' tags
+            if prefetched:
+                self.freebaseAdapter.releasePrefetched()
+
+        logging.debug('Indexed %s tags', len(index.tags))
+
+        # all tag files have been parsed for the index
+        self.saveTagFileCache()
+
+        return index
+
+    def __prefetchFreebaseQueries(self, items):
+        queries = []
+        for item in items:
+            queries.extend(item.freebaseQueries)
+
+        if len(queries) == 0:
+            return False
+
+        self.freebaseAdapter.prefetch(queries)
+
+        return True
+
+    def saveTagFileCache(self):
+        if self.tagFileCache is None:
+            return
+
+        self.tagFileCache.save()
+
+    def __removeItem(self, items, index, itemName):
+        item = items.pop(itemName, None)
+
+        if item is None:
+            return
+
+        index.removeItem(item)
+
+    def __addItem(self, items, index, itemName):
+        item = self.__createItem(itemName)
+
+        if item.tagged:
+            # parse the tags before the item gets visible
+            item.tags
+
+        self.__registerItem(item)
+        index.addItem(item)
+
+        items[itemName] = item
+
+    def __updateItem(self, items, index, item):
+        """Parses the tags of an already known item again.
+
+        The item keeps it's id.
+        """
+
+        index.removeItem(item)
+
+        item.invalidateTags()
+
+        try:
+            if item.tagged:
+                item.tags
+        except IOError:
+            del items[item.name]
+
+            raise
+
+        index.addItem(item)
+
+    def __publish(self, items, index):
+        """Replaces the items and the index with their changed copies.
+
+        The generation is incremented afterwards. So values derived from the
+        old items are calculated again.
+        """
+
+        self.items = items
+        self.index = index
+
+        self.parseTime = time.time()
+        self.generation += 1
+
+    def reloadItems(self, itemNames):
+        """Reloads the tags of the given items.
+
+        Items are dropped if their directory no longer exists. Only the
+        affected items and the derived item sets and index entries are
+        updated. The changes are applied to copies of the items and the index
+        which are published together. So concurrent readers see either all or
+        none of the changes.
+        """
+
+        with self.lock:
+            items = dict(self.items)
+            index = self.index.copy()
+
+            for itemName in itemNames:
+                logging.debug('Reloading item %s', itemName)
+
+                item = items.get(itemName)
+
+                if not self.system.isDirectory(self.getItemDirectory(itemName)):
+                    self.__removeItem(items, index, itemName)
+
+                    continue
+
+                try:
+                    if item is None:
+                        self.__addItem(items, index, itemName)
+                    else:
+                        self.__updateItem(items, index, item)
+                except IOError, (error, strerror):
+                    logging.error('Can \'t read tags for item %s: %s',
+                                  itemName,
+                                  strerror)
+
+            self.__publish(items, index)
+
+    def reloadItem(self, itemName):
+        """Reloads the tags of a single item.
+        """
+
+        self.reloadItems([itemName, ])
+
+    def validateItems(self):
+        """Indexes the items again which tag files have changed.
+
+        The tag files are checked at most once per tagFileCheckInterval
+        seconds. The tag files are never checked if tagFileCheckInterval is
+        None.
+        """
+
+        if self.tagFileCheckInterval is None:
+            return
+
+        with self.lock:
+            now = time.time()
+
+            if now - self.validationTime < self.tagFileCheckInterval:
+                return
+
+            self.validationTime = now
+
+            changedItems = []
+            failedItemNames = []
+
+            for item in self.items.itervalues():
+                try:
+                    # the item's tags are parsed again if the tag file changed
+                    if not item.tags is self.index.getIndexedTags(item):
+                        changedItems.append(item)
+                except IOError, (error, strerror):
+                    logging.error('Can \'t read tags for item %s: %s',
+                                  item.name,
+                                  strerror)
+
+                    failedItemNames.append(item.name)
+
+            if len(changedItems) == 0 and len(failedItemNames) == 0:
+                return
+
+            logging.debug('Tags of %s items changed', len(changedItems) + len(failedItemNames))
+
+            items = dict(self.items)
+            index = self.index.copy()
+
+            for item in changedItems:
+                index.removeItem(item)
+                index.addItem(item)
+
+            for itemName in failedItemNames:
+                self.__removeItem(items, index, itemName)
+
+            self.__publish(items, index)
+
+    @property
+    def tags(self):
+        return set(self.index.tags)
+
+    def getItemsByContextValue(self, context, value):
+        return self.index.getItemsByContextValue(context, value)
+
+    def getItemsByContext(self, context):
+        return self.index.getItemsByContext(context)
+
+    def getItemsByValue(self, value):
+        return self.index.getItemsByValue(value)
+
+    def __getFilterValue(self, cache, filterKey, calculate):
+        # the generation is read before the value is calculated. so a value
+        # is never cached for a newer generation than the items it was
+        # calculated from.
+        key = (self.generation, filterKey, )
+
+        value = cache.get(key)
+
+        if value is None:
+            value = calculate()
+
+            cache[key] = value
+
+        return value
+
+    def getFilteredItems(self, filterKey, filterItems):
+        """Returns the items selected by the filters in filterKey.
+
+        Nodes with the same filters share the items. filterItems is only
+        called if the items are not cached yet.
+        """
+
+        return self.__getFilterValue(self.filteredItemsCache, filterKey, filterItems)
+
+    def getFacets(self, filterKey, getItems):
+        """Returns the facets of the items selected by the filters in
+        filterKey.
+
+        Nodes with the same filters share the facets. getItems is only called
+        if the facets are not cached yet.
+        """
+
+        return self.__getFilterValue(self.facetCache, filterKey, lambda: Facets(getItems()))
 
     def getItemDirectory(self, item):
         return os.path.join(self.dataDirectory, item)
@@ -327,27 +726,12 @@ class ItemAccess(object):
         return contextTags
     
     @property
-    @cache
     def contexts(self):
-        contexts = set()
-
-        for tag in self.tags:
-            if tag.context == None:
-                continue
-
-            contexts.add(tag.context)
-        
-        return contexts
+        return set(self.index.contexts)
 
     @property
-    @cache
     def values(self):
-        values = set()
-
-        for tag in self.tags:
-            values.add(tag.value)
-
-        return values
+        return set(self.index.values)
 
     def __str__(self):
         return '[' + ', '.join([field + ': ' + str(self.__dict__[field]) for field in ['dataDirectory', 'tagFileName']]) + ']'
@@ -0,0 +1,91 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+class Facets(object):
+    """Counts how many items of an item set are tagged with each context,
+    value and context value.
+
+    The counts are collected in one pass over the items. Directory listings
+    and pruning then look up the counts instead of scanning the items again.
+    Contextless tags are counted under the context None.
+    """
+
+    def __init__(self, items):
+        self.itemsCount = 0
+
+        # maps the contexts to dicts which map the values to their counts
+        self.contextValueCounts = {}
+
+        self.contextCounts = {}
+        self.valueCounts = {}
+
+        contextValueCounts = self.contextValueCounts
+        contextCounts = self.contextCounts
+        valueCounts = self.valueCounts
+
+        for item in items:
+            self.itemsCount += 1
+
+            tags = item.tags
+
+            if tags is None:
+                continue
+
+            # an item is counted only once even if it's tagged twice with
+            # the same value
+            contextValues = set([(tag.context, tag.value) for tag in tags])
+
+            for context, value in contextValues:
+                counts = contextValueCounts.get(context)
+
+                if counts is None:
+                    counts = {}
+
+                    contextValueCounts[context] = counts
+
+                counts[value] = counts.get(value, 0) + 1
+
+            for context in set([context for context, value in contextValues]):
+                contextCounts[context] = contextCounts.get(context, 0) + 1
+
+            for value in set([value for context, value in contextValues]):
+                valueCounts[value] = valueCounts.get(value, 0) + 1
+
+    @property
+    def contexts(self):
+        """Returns the contexts of the items without None.
+        """
+
+        return [context for context in self.contextValueCounts.iterkeys() if not context is None]
+
+    @property
+    def values(self):
+        return self.valueCounts.iterkeys()
+
+    def getValuesByContext(self, context):
+        return self.contextValueCounts.get(context, {}).iterkeys()
+
+    def getContextValueCount(self, context, value):
+        return self.contextValueCounts.get(context, {}).get(value, 0)
+
+    def getContextCount(self, context):
+        return self.contextCounts.get(context, 0)
+
+    def getValueCount(self, value):
+        return self.valueCounts.get(value, 0)
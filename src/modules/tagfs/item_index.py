@@ -0,0 +1,168 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+from item_set import ItemSet
+
+class ItemIndex(object):
+    """Inverted index from taggings to the tagged items.
+
+    The index maps (context, value) pairs, contexts and values to the set of
+    items which are tagged with them. Filter nodes use the index to select
+    their items via set intersection instead of scanning every item's tags.
+    The index also keeps the sets of tagged and untagged items and the tags
+    each item was indexed with. So an item can be removed even after it's
+    tags changed.
+
+    All item sets are ItemSet instances based on the given itemTable.
+    """
+
+    def __init__(self, itemTable):
+        self.itemTable = itemTable
+        self.contextValueItems = {}
+        self.contextItems = {}
+        self.valueItems = {}
+        self.tags = set()
+        self.taggedItems = self.emptyItems
+        self.untaggedItems = self.emptyItems
+
+        # maps the item ids to the indexed tags of the tagged items
+        self.itemTags = {}
+
+    def copy(self):
+        """Returns an independent copy of the index.
+
+        The item sets are immutable. So they are shared with the copy.
+        """
+
+        index = ItemIndex(self.itemTable)
+        index.contextValueItems = dict(self.contextValueItems)
+        index.contextItems = dict(self.contextItems)
+        index.valueItems = dict(self.valueItems)
+        index.tags = set(self.tags)
+        index.taggedItems = self.taggedItems
+        index.untaggedItems = self.untaggedItems
+        index.itemTags = dict(self.itemTags)
+
+        return index
+
+    @property
+    def emptyItems(self):
+        return ItemSet(self.itemTable)
+
+    def _addToIndex(self, index, idsByKey):
+        for key, ids in idsByKey.iteritems():
+            items = ItemSet.fromIds(self.itemTable, ids)
+
+            if key in index:
+                index[key] = index[key].union(items)
+            else:
+                index[key] = items
+
+    def addItems(self, items):
+        taggedIds = []
+        untaggedIds = []
+        contextValueIds = {}
+        contextIds = {}
+        valueIds = {}
+
+        for item in items:
+            tags = item.tags
+
+            if tags is None:
+                untaggedIds.append(item.id)
+
+                continue
+
+            taggedIds.append(item.id)
+            self.itemTags[item.id] = tags
+
+            for tag in tags:
+                contextValueIds.setdefault((tag.context, tag.value), []).append(item.id)
+                valueIds.setdefault(tag.value, []).append(item.id)
+
+                if not tag.context is None:
+                    contextIds.setdefault(tag.context, []).append(item.id)
+
+                self.tags.add(tag)
+
+        self._addToIndex(self.contextValueItems, contextValueIds)
+        self._addToIndex(self.contextItems, contextIds)
+        self._addToIndex(self.valueItems, valueIds)
+
+        self.taggedItems = self.taggedItems.union(ItemSet.fromIds(self.itemTable, taggedIds))
+        self.untaggedItems = self.untaggedItems.union(ItemSet.fromIds(self.itemTable, untaggedIds))
+
+    def addItem(self, item):
+        self.addItems([item, ])
+
+    def _removeFromIndex(self, index, key, items):
+        if not key in index:
+            return False
+
+        remainingItems = index[key].difference(items)
+
+        if remainingItems:
+            index[key] = remainingItems
+
+            return False
+
+        del index[key]
+
+        return True
+
+    def removeItem(self, item):
+        items = ItemSet(self.itemTable, ids = frozenset([item.id, ]))
+
+        tags = self.itemTags.pop(item.id, None)
+
+        if tags is None:
+            self.untaggedItems = self.untaggedItems.difference(items)
+
+            return
+
+        self.taggedItems = self.taggedItems.difference(items)
+
+        for tag in tags:
+            if self._removeFromIndex(self.contextValueItems, (tag.context, tag.value), items):
+                self.tags.discard(tag)
+
+            self._removeFromIndex(self.valueItems, tag.value, items)
+
+            if not tag.context is None:
+                self._removeFromIndex(self.contextItems, tag.context, items)
+
+    def getIndexedTags(self, item):
+        return self.itemTags.get(item.id)
+
+    def getItemsByContextValue(self, context, value):
+        return self.contextValueItems.get((context, value), self.emptyItems)
+
+    def getItemsByContext(self, context):
+        return self.contextItems.get(context, self.emptyItems)
+
+    def getItemsByValue(self, value):
+        return self.valueItems.get(value, self.emptyItems)
+
+    @property
+    def contexts(self):
+        return self.contextItems.iterkeys()
+
+    @property
+    def values(self):
+        return self.valueItems.iterkeys()
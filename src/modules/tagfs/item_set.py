@@ -0,0 +1,187 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import binascii
+
+# sets are stored as bitmap when at least one in DENSITY_THRESHOLD of the
+# possible item ids is in the set.
+DENSITY_THRESHOLD = 32
+
+def bitsFromIds(ids):
+    if len(ids) == 0:
+        return 0
+
+    b = bytearray((max(ids) >> 3) + 1)
+
+    for i in ids:
+        b[i >> 3] |= 1 << (i & 7)
+
+    b.reverse()
+
+    return long(binascii.hexlify(b), 16)
+
+def idsFromBits(bits):
+    s = bin(bits)
+    top = len(s) - 1
+
+    ids = []
+
+    # skip the '0b' prefix
+    p = s.find('1', 2)
+    while p != -1:
+        ids.append(top - p)
+
+        p = s.find('1', p + 1)
+
+    return ids
+
+def countBits(bits):
+    return bin(bits).count('1')
+
+def bitLength(bits):
+    # long.bit_length is not available before python 2.7
+    if bits == 0:
+        return 0
+
+    # skip the '0b' prefix
+    return len(bin(bits)) - 2
+
+class ItemSet(object):
+    """Immutable set of items.
+
+    Items are identified by their dense integer id. The itemTable maps the
+    ids back to the items. Sparse sets store the ids in a frozenset. Dense
+    sets store the ids as bitmap in a long so intersections, unions and
+    differences of large sets are single bitwise operations.
+    """
+
+    __slots__ = ('itemTable', '_ids', '_bits', '_len')
+
+    def __init__(self, itemTable, ids = frozenset(), bits = None):
+        self.itemTable = itemTable
+        self._ids = ids
+        self._bits = bits
+        self._len = None
+
+    @staticmethod
+    def fromIds(itemTable, ids):
+        if len(ids) > 0 and len(ids) * DENSITY_THRESHOLD > max(ids):
+            return ItemSet(itemTable, ids = None, bits = bitsFromIds(ids))
+
+        return ItemSet(itemTable, ids = frozenset(ids))
+
+    @staticmethod
+    def fromBits(itemTable, bits):
+        if countBits(bits) * DENSITY_THRESHOLD > bitLength(bits):
+            return ItemSet(itemTable, ids = None, bits = bits)
+
+        return ItemSet(itemTable, ids = frozenset(idsFromBits(bits)))
+
+    @property
+    def isDense(self):
+        return self._ids is None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            return idsFromBits(self._bits)
+
+        return self._ids
+
+    @property
+    def bits(self):
+        if self._bits is None:
+            return bitsFromIds(self._ids)
+
+        return self._bits
+
+    def _coerce(self, items):
+        if isinstance(items, ItemSet):
+            return items
+
+        return ItemSet.fromIds(self.itemTable, [item.id for item in items])
+
+    def intersection(self, items):
+        other = self._coerce(items)
+
+        if not self.isDense and not other.isDense:
+            return ItemSet(self.itemTable, ids = self._ids & other._ids)
+
+        return ItemSet.fromBits(self.itemTable, self.bits & other.bits)
+
+    def union(self, items):
+        other = self._coerce(items)
+
+        if not self.isDense and not other.isDense:
+            return ItemSet.fromIds(self.itemTable, self._ids | other._ids)
+
+        return ItemSet.fromBits(self.itemTable, self.bits | other.bits)
+
+    def difference(self, items):
+        other = self._coerce(items)
+
+        if not self.isDense and not other.isDense:
+            return ItemSet(self.itemTable, ids = self._ids - other._ids)
+
+        return ItemSet.fromBits(self.itemTable, self.bits & ~other.bits)
+
+    __and__ = intersection
+
+    __or__ = union
+
+    __sub__ = difference
+
+    def __len__(self):
+        if self._len is None:
+            if self._ids is None:
+                self._len = countBits(self._bits)
+            else:
+                self._len = len(self._ids)
+
+        return self._len
+
+    def __nonzero__(self):
+        if self._ids is None:
+            return self._bits != 0
+
+        return len(self._ids) > 0
+
+    def __iter__(self):
+        itemTable = self.itemTable
+
+        for i in self.ids:
+            yield itemTable[i]
+
+    def __contains__(self, item):
+        if self._ids is None:
+            return (self._bits >> item.id) & 1 == 1
+
+        return item.id in self._ids
+
+    def __eq__(self, other):
+        if not isinstance(other, ItemSet):
+            return False
+
+        return self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '<ItemSet %s>' % ', '.join(sorted([item.name for item in self]))
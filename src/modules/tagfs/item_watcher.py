@@ -0,0 +1,213 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import os
+import time
+
+def createItemWatcher(itemAccess):
+    # pyinotify is an optional dependency. tagfs should execute even if it's
+    # not available.
+    try:
+        import pyinotify
+    except ImportError:
+        logging.warn('live reload of tag files disabled as pyinotify is not available')
+
+        return ItemWatcherStub()
+
+    logging.info('live reload of tag files enabled')
+
+    return ItemWatcher(itemAccess, pyinotify)
+
+class ItemWatcherStub(object):
+
+    def processEvents(self):
+        pass
+
+class ItemWatcher(object):
+    """Watches the items directory and the items' tag files via inotify.
+
+    Changes are collected per item and applied to the item access when
+    processEvents is called. processEvents never blocks so it can be called
+    before every file system request. If the kernel's event queue overflowed
+    the events are lost. Then the items directory is scanned again and all
+    items are reloaded.
+
+    Items which can't be watched, for example because the inotify watches
+    are exhausted, are polled every pollInterval seconds instead. Their tag
+    files are stat'ed and the items are reloaded if the stat results
+    changed.
+
+    pyinotify is passed as module so the events can be tested without
+    inotify.
+    """
+
+    def __init__(self, itemAccess, pyinotify, pollInterval = 10, now = time.time):
+        self.itemAccess = itemAccess
+        self.pyinotify = pyinotify
+        self.pollInterval = pollInterval
+        self.now = now
+        self.changedItemNames = set()
+        self.rescanRequired = False
+
+        # maps the names of the items which can't be watched to their last
+        # polled signatures
+        self.polledItems = {}
+        self.pollTime = self.now()
+
+        self.itemsDirectoryMask = pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO | pyinotify.IN_ONLYDIR
+        self.itemDirectoryMask = pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO
+
+        self.watchManager = pyinotify.WatchManager()
+        self.notifier = pyinotify.Notifier(self.watchManager, default_proc_fun = self._processEvent, timeout = 0)
+
+        if not self._addWatch(self.itemAccess.dataDirectory, self.itemsDirectoryMask):
+            logging.error('Can\'t watch items directory %s. New items are not detected.', self.itemAccess.dataDirectory)
+
+        for itemName in self.itemAccess.items.iterkeys():
+            self._watchItem(itemName)
+
+    def _addWatch(self, path, mask):
+        # the watch descriptor is negative if the watch could not be added.
+        # paths which are already watched are not returned.
+        wd = self.watchManager.add_watch(path, mask).get(path)
+
+        return wd is None or wd >= 0
+
+    def _getPollSignature(self, itemName):
+        try:
+            s = self.itemAccess.system.stat(os.path.join(self.itemAccess.getItemDirectory(itemName), self.itemAccess.tagFileName))
+        except OSError:
+            return None
+
+        return (s.st_mtime, s.st_size, s.st_ino)
+
+    def _watchItem(self, itemName):
+        itemDirectory = self.itemAccess.getItemDirectory(itemName)
+
+        if not self.itemAccess.system.isDirectory(itemDirectory):
+            return
+
+        if self._addWatch(itemDirectory, self.itemDirectoryMask):
+            return
+
+        logging.warn('Can\'t watch item %s. It is checked for changes every %s seconds.', itemName, self.pollInterval)
+
+        self.polledItems[itemName] = self._getPollSignature(itemName)
+
+    def _unwatchItem(self, itemName):
+        self.polledItems.pop(itemName, None)
+
+        wd = self.watchManager.get_wd(self.itemAccess.getItemDirectory(itemName))
+
+        if wd is None:
+            return
+
+        self.watchManager.rm_watch(wd, quiet = True)
+
+    def _processEvent(self, event):
+        pyinotify = self.pyinotify
+
+        if event.mask & pyinotify.IN_Q_OVERFLOW:
+            # overflow events have no path
+            logging.warn('inotify event queue overflowed. Reloading all items.')
+
+            self.rescanRequired = True
+
+            return
+
+        if event.path == self.itemAccess.dataDirectory:
+            # an item directory has been created, deleted or renamed
+            itemName = event.name
+
+            if itemName == '.tagfs':
+                return
+
+            if event.mask & pyinotify.IN_MOVED_FROM:
+                self._unwatchItem(itemName)
+            elif event.mask & (pyinotify.IN_CREATE | pyinotify.IN_MOVED_TO):
+                self._watchItem(itemName)
+        elif event.name == self.itemAccess.tagFileName:
+            itemName = os.path.basename(event.path)
+        else:
+            return
+
+        self.changedItemNames.add(itemName)
+
+    def _rescan(self):
+        """Returns the names of the known items and the items in the items
+        directory.
+
+        Items which are not known yet are watched.
+        """
+
+        itemNames = set(self.itemAccess.items.iterkeys())
+
+        for itemName in self.itemAccess.system.listDirectories(self.itemAccess.dataDirectory):
+            if itemName == '.tagfs' or itemName in itemNames:
+                continue
+
+            self._watchItem(itemName)
+
+            itemNames.add(itemName)
+
+        return itemNames
+
+    def _pollItems(self):
+        now = self.now()
+
+        if now - self.pollTime < self.pollInterval:
+            return
+
+        self.pollTime = now
+
+        for itemName, signature in self.polledItems.items():
+            if not self.itemAccess.system.isDirectory(self.itemAccess.getItemDirectory(itemName)):
+                # the item has been deleted
+                del self.polledItems[itemName]
+            else:
+                newSignature = self._getPollSignature(itemName)
+
+                if newSignature == signature:
+                    continue
+
+                self.polledItems[itemName] = newSignature
+
+            self.changedItemNames.add(itemName)
+
+    def processEvents(self):
+        while self.notifier.check_events():
+            self.notifier.read_events()
+            self.notifier.process_events()
+
+        if self.rescanRequired:
+            self.rescanRequired = False
+
+            self.changedItemNames.update(self._rescan())
+
+        if len(self.polledItems) > 0:
+            self._pollItems()
+
+        changedItemNames = self.changedItemNames
+        self.changedItemNames = set()
+
+        if len(changedItemNames) == 0:
+            return
+
+        self.itemAccess.reloadItems(changedItemNames)
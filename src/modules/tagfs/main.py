@@ -40,8 +40,10 @@ if not hasattr(fuse, '__version__'):
 fuse.fuse_python_api = (0, 2)
 
 from view import View
-from cache import cache
+from cache import cachedProperty, enableStatistics, enableThreadSafety
 from item_access import ItemAccess
+from item_watcher import createItemWatcher, ItemWatcherStub
+from tag_file_cache import TagFileCache
 from config import parseConfig
 from log import logException
 
@@ -55,6 +57,8 @@ class TagFS(fuse.Fuse):
         
         self._initwd = initwd
         self._itemsRoot = None
+        self._tagFileCache = None
+        self._freebaseAdapter = None
 
         self.system = sysIO.createSystem()
 
@@ -109,16 +113,26 @@ class TagFS(fuse.Fuse):
         # Something along
         # assert not os.path.normpath(itemsDir).startswith(itemsRoot)
 
+        if self.config.enablePersistentIndex:
+            self._tagFileCache = TagFileCache(self.system, os.path.join(itemsRoot, '.tagfs', 'index'))
+            self._tagFileCache.load()
+
+        self._freebaseAdapter = freebase_support.createFreebaseAdapter(self.system, os.path.join(itemsRoot, '.tagfs', 'freebase_cache'), self.config.freebaseCacheTimeout, self.config.freebaseCacheSize, self.config.freebaseThreads, self.config.freebaseTimeout, self.config.freebaseFailureTimeout)
+
+        tagFileCheckInterval = self.config.tagFileCheckInterval
+        if tagFileCheckInterval <= 0:
+            # tag files are only checked for changes when configured
+            tagFileCheckInterval = None
+
         # try/except here?
         try:
-            return ItemAccess(self.system, itemsRoot, self.config.tagFileName, freebase_support.QueryParser(), freebase_support.createFreebaseAdapter(), self.parseGenericFreebaseQueries(itemsRoot))
+            return ItemAccess(self.system, itemsRoot, self.config.tagFileName, freebase_support.QueryParser(), self._freebaseAdapter, self.parseGenericFreebaseQueries(itemsRoot), scanThreads = self.config.scanThreads, tagFileCache = self._tagFileCache, tagFileCheckInterval = tagFileCheckInterval, filterCacheSize = self.config.filterCacheSize)
         except OSError, e:
             logging.error("Can't create item access from items directory %s. Reason: %s",
                     itemsRoot, str(e.strerror))
             raise
     
-    @property
-    @cache
+    @cachedProperty
     def config(self):
         opts, args = self.cmdline
 
@@ -137,12 +151,55 @@ class TagFS(fuse.Fuse):
 
         return c
 
-    @property
-    @cache
+    def addFuseOptions(self):
+        if not self.config.enableMultithreading:
+            # fuse serves the requests from multiple threads unless -s is
+            # given on the command line
+            self.multithreaded = False
+
+        # the nodes' inode numbers are stable so the kernel may use them
+        self.fuse_args.add('use_ino')
+
+        # options from the command line win over the configuration
+        for option, value in [('attr_timeout', self.config.attrTimeout),
+                              ('entry_timeout', self.config.entryTimeout),
+                              ('negative_timeout', self.config.negativeTimeout), ]:
+            if option in self.fuse_args.optdict:
+                continue
+
+            self.fuse_args.add(option, str(value))
+
+    @cachedProperty
     def view(self):
         itemAccess = self.getItemAccess()
 
-        return View(itemAccess, self.config)
+        if self.config.enableLiveReload:
+            itemWatcher = createItemWatcher(itemAccess)
+        else:
+            itemWatcher = ItemWatcherStub()
+
+        return View(itemAccess, self.config, itemWatcher)
+
+    def fsinit(self):
+        # fuse sends no other request before fsinit returned. so the cache
+        # switches and the view are set up before requests are served from
+        # multiple threads.
+        if self.config.enableCacheStatistics:
+            # statistics must be enabled before the first value is cached
+            enableStatistics()
+
+        if self.multithreaded:
+            # thread safety must be enabled before the first value is cached
+            enableThreadSafety()
+
+        self.view
+
+    def fsdestroy(self):
+        if not self._tagFileCache is None:
+            self._tagFileCache.save()
+
+        if not self._freebaseAdapter is None:
+            self._freebaseAdapter.save()
 
     @logException
     def getattr(self, path):
@@ -161,8 +218,13 @@ class TagFS(fuse.Fuse):
         return self.view.open(path, flags)
 
     @logException
-    def read(self, path, size, offset):
-        return self.view.read(path, size, offset)
+    def read(self, path, size, offset, fh = None):
+        # fh is only passed for files which returned a handle from open
+        return self.view.read(path, size, offset, fh)
+
+    def release(self, path, flags, fh = None):
+        # fuse drops it's reference to the handle after release
+        return 0
 
     @logException
     def write(self, path, data, pos):
@@ -189,6 +251,8 @@ def main():
         #        probably be handled via some return code.
         import sys
         sys.exit()
+
+    fs.addFuseOptions()
         
     return fs.main()
 
@@ -18,9 +18,27 @@
 #
 
 import fuse
+import hashlib
 import stat
+import struct
 
-from cache import cache
+from cache import cachedProperty, GenerationReloadStrategy
+
+# values derived from the items are recalculated after the items changed
+itemAccessGeneration = GenerationReloadStrategy(lambda node: node.itemAccess.generation)
+
+def createInode(inodeKey):
+    """Returns the inode number for a node's inode key.
+
+    The inode key is a tuple of strings and tuples which canonically
+    describes the node. The inode number is derived from the key's hash so
+    it is the same after remounting.
+    """
+
+    digest = hashlib.md5(repr(inodeKey)).digest()
+
+    # the inode numbers 0 and 1 have a special meaning
+    return max(2, struct.unpack('<Q', digest[:8])[0] & 0x7fffffffffffffff)
 
 class Stat(fuse.Stat):
     
@@ -41,6 +59,8 @@ class Stat(fuse.Stat):
 
 class ItemLinkNode(object):
 
+    fileType = stat.S_IFLNK
+
     def __init__(self, item):
         self.item = item
 
@@ -48,11 +68,21 @@ class ItemLinkNode(object):
     def name(self):
         return self.item.name
 
+    @property
+    def inodeKey(self):
+        # all links to an item share the inode
+        return ('item', self.item.name, )
+
+    @cachedProperty
+    def ino(self):
+        return createInode(self.inodeKey)
+
     @property
     def attr(self):
         s = Stat()
 
-        s.st_mode = stat.S_IFLNK | 0444
+        s.st_mode = self.fileType | 0444
+        s.st_ino = self.ino
         s.st_nlink = 2
     
         return s
@@ -66,11 +96,18 @@ class ItemLinkNode(object):
 
 class DirectoryNode(object):
 
+    fileType = stat.S_IFDIR
+
+    @cachedProperty
+    def ino(self):
+        return createInode(self.inodeKey)
+
     @property
     def attr(self):
         s = Stat()
 
-        s.st_mode = stat.S_IFDIR | 0555
+        s.st_mode = self.fileType | 0555
+        s.st_ino = self.ino
 
         s.st_mtime = 0
         s.st_ctime = s.st_mtime
@@ -84,7 +121,19 @@ class DirectoryNode(object):
     def _addsValue(self, child):
         return True
 
-    @property
-    @cache
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
     def entries(self):
         return dict([[e.name, e] for e in self._entries if self._addsValue(e)])
+
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
+    def sortedEntries(self):
+        """Returns the names of the entries in a stable order together with
+        the entries.
+
+        The names are taken from the returned entries. So they always match
+        even if the items change between two accesses.
+        """
+
+        entries = self.entries
+
+        return sorted(entries.iterkeys()), entries
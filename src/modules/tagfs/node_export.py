@@ -17,7 +17,6 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
 from node import Stat, ItemLinkNode, DirectoryNode
 from node_untagged_items import UntaggedItemsDirectoryNode
 from node_export_csv import ExportCsvFileNode
@@ -43,6 +42,10 @@ class ExportDirectoryNode(DirectoryNode):
     def name(self):
         return '.export'
 
+    @property
+    def inodeKey(self):
+        return ('export', self.parentNode.filterKey, )
+
     @property
     def attr(self):
         s = super(ExportDirectoryNode, self).attr
@@ -17,7 +17,8 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
+from cache import cachedProperty
+from node import itemAccessGeneration
 from node_file import FileNode
 import pylab
 import cStringIO
@@ -35,12 +36,15 @@ class ChartImageNode(FileNode):
     def name(self):
         return '%s-%s.png' % (self.title, self.context,)
 
+    @property
+    def inodeKey(self):
+        return ('chart', self.parentNode.filterKey, self.context, self.title, )
+
     @property
     def items(self):
         return self.parentNode.items
 
-    @property
-    @cache
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
     def content(self):
         pylab.clf()
 
@@ -17,7 +17,8 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
+from cache import cachedProperty
+from node import itemAccessGeneration
 from node_file import FileNode
 
 class ExportCsvFileNode(FileNode):
@@ -38,6 +39,10 @@ class ExportCsvFileNode(FileNode):
     def name(self):
         return 'export.csv'
 
+    @property
+    def inodeKey(self):
+        return ('exportCsv', self.parentNode.filterKey, )
+
     @property
     def items(self):
         return self.parentNode.items
@@ -60,10 +65,8 @@ class ExportCsvFileNode(FileNode):
 
     @property
     def _content(self):
-        contexts = set()
-        for i in self.items:
-            for t in i.tags:
-                contexts.add(t.context)
+        # contains None if an item has contextless tags
+        contexts = set(self.parentNode.facets.contextValueCounts.iterkeys())
 
         headline = ['name', ]
         for c in contexts:
@@ -80,7 +83,6 @@ class ExportCsvFileNode(FileNode):
             for s in self.formatRow(row):
                 yield s
 
-    @property
-    @cache
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
     def content(self):
         return ''.join(self._content)
@@ -19,15 +19,23 @@
 
 import array
 import stat
-from node import Stat
+from cache import cachedProperty
+from node import Stat, createInode
 
 class FileNode(object):
+
+    fileType = stat.S_IFREG
+
+    @cachedProperty
+    def ino(self):
+        return createInode(self.inodeKey)
     
     @property
     def attr(self):
         s = Stat()
 
-        s.st_mode = stat.S_IFREG | 0444
+        s.st_mode = self.fileType | 0444
+        s.st_ino = self.ino
         s.st_nlink = 2
 
         # TODO replace with memory saving size calculation
@@ -17,8 +17,8 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
-from node import Stat, ItemLinkNode, DirectoryNode
+from cache import cachedProperty
+from node import Stat, ItemLinkNode, DirectoryNode, itemAccessGeneration
 from node_export import ExportDirectoryNode
 
 class FilterDirectoryNode(DirectoryNode):
@@ -42,19 +42,78 @@ class FilterDirectoryNode(DirectoryNode):
         return s
 
     @property
-    def contexts(self):
-        c = set()
+    def filters(self):
+        """Returns the filters which select this node's items as a set of
+        tuples.
+        """
 
-        for item in self.items:
-            for t in item.tags:
-                context = t.context
+        return frozenset()
 
-                if context is None:
-                    continue
+    @cachedProperty
+    def filterKey(self):
+        """Returns the filters in a canonical order.
+
+        Nodes which apply the same filters in a different order have the
+        same filter key.
+        """
+
+        return tuple(sorted(self.filters))
+
+    @property
+    def inodeKey(self):
+        return ('filter', self.filterKey, )
+
+    @cachedProperty
+    def appliedContexts(self):
+        """Returns the contexts which are constrained by this node's filters.
+        """
+
+        return frozenset([f[1] for f in self.filters if f[0] in ('contextValue', 'unset', )])
+
+    @cachedProperty
+    def appliedValues(self):
+        """Returns the values which are constrained by this node's value
+        filters.
+        """
+
+        return frozenset([f[1] for f in self.filters if f[0] == 'value'])
+
+    @property
+    def _enableFilters(self):
+        maxFilterDepth = self.config.maxFilterDepth
+
+        return maxFilterDepth <= 0 or len(self.filters) < maxFilterDepth
+
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
+    def items(self):
+        """Returns the items selected by this node's filters.
+
+        All nodes with the same filters share the items. So the items are
+        only calculated via _filterItems() by the first node of a filter
+        combination no matter in which order the filters were applied.
+        """
 
-                c.add(context)
+        return self.itemAccess.getFilteredItems(self.filterKey, self._filterItems)
 
-        return c
+    def _filterItems(self):
+        """Calculates the items selected by this node's filters.
+        """
+
+        raise NotImplementedError()
+
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
+    def facets(self):
+        """Returns the counts of the contexts and values of this node's
+        items.
+
+        All nodes with the same filters share the facets.
+        """
+
+        return self.itemAccess.getFacets(self.filterKey, lambda: self.items)
+
+    @property
+    def contexts(self):
+        return set(self.facets.contexts)
 
     @property
     def _enableItemLinks(self):
@@ -70,27 +129,46 @@ class FilterDirectoryNode(DirectoryNode):
 
         yield ExportDirectoryNode(self.itemAccess, self)
 
-        yield AnyContextValueListDirectoryNode(self.itemAccess, self.config, self)
+        if(self._enableFilters):
+            enableRecursionPruning = self.config.enableRecursionPruning
+
+            yield AnyContextValueListDirectoryNode(self.itemAccess, self.config, self)
 
-        if(self.config.enableValueFilters):
-            for value in self.itemAccess.values:
-                yield ValueFilterDirectoryNode(self.itemAccess, self.config, self, value)
+            if(self.config.enableValueFilters):
+                for value in self.facets.values:
+                    if(enableRecursionPruning and value in self.appliedValues):
+                        continue
 
-        for context in self.contexts:
-            yield ContextValueListDirectoryNode(self.itemAccess, self.config, self, context)
+                    yield ValueFilterDirectoryNode(self.itemAccess, self.config, self, value)
+
+            for context in self.contexts:
+                if(enableRecursionPruning and context in self.appliedContexts):
+                    continue
+
+                yield ContextValueListDirectoryNode(self.itemAccess, self.config, self, context)
 
         if(self._enableItemLinks):
             for item in self.items:
                 yield ItemLinkNode(item)
 
+    @property
+    def itemsCount(self):
+        """Returns the number of this node's items.
+
+        Subclasses count the items without creating the item set. So
+        checking whether a node adds value doesn't materialize it's items.
+        """
+
+        return len(self.items)
+
     def addsValue(self, parentItems):
-        itemsLen = len(list(self.items))
+        itemsLen = self.itemsCount
         if(itemsLen == 0):
             return False
 
         # TODO we should not compare the lengths but whether the child and
         # parent items are different
-        parentItemsLen = len(list(parentItems))
+        parentItemsLen = len(parentItems)
 
         return itemsLen != parentItemsLen
 
@@ -17,7 +17,7 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
+from cache import cachedProperty
 from node import Stat, ItemLinkNode, DirectoryNode
 from node_filter import FilterDirectoryNode
 from node_untagged_items import UntaggedItemsDirectoryNode
@@ -33,13 +33,16 @@ class AnyContextValueFilterDirectoryNode(FilterDirectoryNode):
     def name(self):
         return self.value
 
-    @property
-    def items(self):
-        for item in self.parentNode.items:
-            if not item.isTaggedWithValue(self.value):
-                continue
+    @cachedProperty
+    def filters(self):
+        return self.parentNode.parentNode.filters | frozenset([('value', self.value, ), ])
 
-            yield item
+    def _filterItems(self):
+        return self.itemAccess.getItemsByValue(self.value).intersection(self.parentNode.items)
+
+    @property
+    def itemsCount(self):
+        return self.parentNode.parentNode.facets.getValueCount(self.value)
     
 class AnyContextValueListDirectoryNode(DirectoryNode):
 
@@ -52,6 +55,10 @@ class AnyContextValueListDirectoryNode(DirectoryNode):
     def name(self):
         return '.any_context'
 
+    @property
+    def inodeKey(self):
+        return ('anyContext', self.parentNode.filterKey, )
+
     @property
     def attr(self):
         s = super(AnyContextValueListDirectoryNode, self).attr
@@ -72,17 +79,16 @@ class AnyContextValueListDirectoryNode(DirectoryNode):
 
     @property
     def contextValues(self):
-        values = set()
-
-        for item in self.parentNode.items:
-            for v in item.values:
-                values.add(v)
-
-        return values
+        return set(self.parentNode.facets.values)
 
     @property
     def _entries(self):
+        enableRecursionPruning = self.config.enableRecursionPruning
+
         for value in self.contextValues:
+            if(enableRecursionPruning and value in self.parentNode.appliedValues):
+                continue
+
             yield AnyContextValueFilterDirectoryNode(self.itemAccess, self.config, self, value)
 
     def addsValue(self, parentItems):
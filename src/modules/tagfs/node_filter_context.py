@@ -17,8 +17,8 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
-from node import Stat, ItemLinkNode, DirectoryNode
+from cache import cachedProperty
+from node import Stat, ItemLinkNode, DirectoryNode, itemAccessGeneration
 from node_filter import FilterDirectoryNode
 from node_untagged_items import UntaggedItemsDirectoryNode
 
@@ -34,13 +34,16 @@ class ContextValueFilterDirectoryNode(FilterDirectoryNode):
     def name(self):
         return self.value
 
-    @property
-    def items(self):
-        for item in self.parentNode.items:
-            if not item.isTaggedWithContextValue(self.context, self.value):
-                continue
+    @cachedProperty
+    def filters(self):
+        return self.parentNode.parentNode.filters | frozenset([('contextValue', self.context, self.value, ), ])
 
-            yield item
+    def _filterItems(self):
+        return self.itemAccess.getItemsByContextValue(self.context, self.value).intersection(self.parentNode.items)
+
+    @property
+    def itemsCount(self):
+        return self.parentNode.parentNode.facets.getContextValueCount(self.context, self.value)
     
 class UnsetContextFilterDirectoryNode(FilterDirectoryNode):
 
@@ -53,13 +56,18 @@ class UnsetContextFilterDirectoryNode(FilterDirectoryNode):
     def name(self):
         return '.unset'
 
+    @cachedProperty
+    def filters(self):
+        return self.parentNode.parentNode.filters | frozenset([('unset', self.context, ), ])
+
+    def _filterItems(self):
+        return self.parentNode.parentNode.items.difference(self.itemAccess.getItemsByContext(self.context))
+
     @property
-    def items(self):
-        for item in self.parentNode.parentNode.items:
-            if item.isTaggedWithContext(self.context):
-                continue
+    def itemsCount(self):
+        facets = self.parentNode.parentNode.facets
 
-            yield item
+        return facets.itemsCount - facets.getContextCount(self.context)
 
 class ContextValueListDirectoryNode(DirectoryNode):
     
@@ -73,6 +81,10 @@ class ContextValueListDirectoryNode(DirectoryNode):
     def name(self):
         return self.context
 
+    @property
+    def inodeKey(self):
+        return ('context', self.parentNode.filterKey, self.context, )
+
     @property
     def attr(self):
         s = super(ContextValueListDirectoryNode, self).attr
@@ -87,23 +99,13 @@ class ContextValueListDirectoryNode(DirectoryNode):
 
         return s
 
-    @property
+    @cachedProperty.withReloadStrategy(itemAccessGeneration)
     def items(self):
-        for item in self.parentNode.items:
-            if not item.isTaggedWithContext(self.context):
-                continue
-
-            yield item
+        return self.itemAccess.getItemsByContext(self.context).intersection(self.parentNode.items)
 
     @property
     def contextValues(self):
-        values = set()
-
-        for item in self.parentNode.items:
-            for tag in item.getTagsByContext(self.context):
-                values.add(tag.value)
-
-        return values
+        return set(self.parentNode.facets.getValuesByContext(self.context))
 
     @property
     def _entries(self):
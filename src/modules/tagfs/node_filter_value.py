@@ -17,6 +17,7 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+from cache import cachedProperty
 from node_filter import FilterDirectoryNode
 
 class ValueFilterDirectoryNode(FilterDirectoryNode):
@@ -30,11 +31,14 @@ class ValueFilterDirectoryNode(FilterDirectoryNode):
     def name(self):
         return self.value
 
-    @property
-    def items(self):
-        for item in self.parentNode.items:
-            if not item.isTaggedWithValue(self.value):
-                continue
+    @cachedProperty
+    def filters(self):
+        return self.parentNode.filters | frozenset([('value', self.value, ), ])
+
+    def _filterItems(self):
+        return self.itemAccess.getItemsByValue(self.value).intersection(self.parentNode.items)
 
-            yield item
+    @property
+    def itemsCount(self):
+        return self.parentNode.facets.getValueCount(self.value)
     
@@ -17,7 +17,9 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import cache
 from node_filter import FilterDirectoryNode
+from node_statistics import StatisticsFileNode
 from node_untagged_items import UntaggedItemsDirectoryNode
 
 class RootDirectoryNode(FilterDirectoryNode):
@@ -37,5 +39,8 @@ class RootDirectoryNode(FilterDirectoryNode):
     def _entries(self):
         yield UntaggedItemsDirectoryNode('.untagged', self.itemAccess)
 
+        if cache.statisticsEnabled:
+            yield StatisticsFileNode()
+
         for e in super(RootDirectoryNode, self)._entries:
             yield e
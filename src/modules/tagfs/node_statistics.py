@@ -0,0 +1,91 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import cache
+from node import Stat
+from node_file import FileNode
+
+class StatisticsFileHandle(object):
+    """Handle of an opened statistics file.
+
+    The statistics change with every request. So the content is captured
+    when the file is opened and all reads of the handle see the same
+    content.
+    """
+
+    # the reported file size is 0. so the kernel has to read until the end of
+    # the content instead of trusting the size.
+    direct_io = True
+
+    keep_cache = False
+
+    def __init__(self, content):
+        self.content = content
+
+    def read(self, size, offset):
+        return self.content[offset:offset + size]
+
+class StatisticsFileNode(FileNode):
+    """Shows the statistics of all caches as tab separated text.
+
+    The size is reported as 0 as the content changes with every request.
+    """
+
+    COL_SEPARATOR = '\t'
+
+    ROW_SEPARATOR = '\n'
+
+    @property
+    def name(self):
+        return '.statistics'
+
+    @property
+    def inodeKey(self):
+        return ('statistics', )
+
+    def addsValue(self, items):
+        return True
+
+    @property
+    def attr(self):
+        s = Stat()
+
+        s.st_mode = self.fileType | 0444
+        s.st_ino = self.ino
+        s.st_nlink = 2
+        s.st_size = 0
+
+        return s
+
+    def open(self, path, flags):
+        return StatisticsFileHandle(self.content)
+
+    def formatRow(self, row):
+        return StatisticsFileNode.COL_SEPARATOR.join([str(col) for col in row]) + StatisticsFileNode.ROW_SEPARATOR
+
+    @property
+    def content(self):
+        rows = [self.formatRow(['name', 'hits', 'misses', 'evictions', 'entries', 'seconds', ]), ]
+
+        for name in sorted(cache.statistics.iterkeys()):
+            s = cache.statistics[name]
+
+            rows.append(self.formatRow([name, s.hits, s.misses, s.evictions, s.entries, '%.6f' % s.time, ]))
+
+        return ''.join(rows)
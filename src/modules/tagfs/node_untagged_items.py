@@ -17,7 +17,6 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from cache import cache
 from node import Stat, ItemLinkNode, DirectoryNode
 
 class UntaggedItemsDirectoryNode(DirectoryNode):
@@ -26,6 +25,10 @@ class UntaggedItemsDirectoryNode(DirectoryNode):
         self.name = name
         self.itemAccess = itemAccess
 
+    @property
+    def inodeKey(self):
+        return ('untagged', )
+
     @property
     def attr(self):
         s = super(UntaggedItemsDirectoryNode, self).attr
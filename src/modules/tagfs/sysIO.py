@@ -16,10 +16,39 @@
 # You should have received a copy of the GNU General Public License
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import os.path
 
+def _getScandir():
+    try:
+        return os.scandir
+    except AttributeError:
+        pass
+
+    # the scandir backport is an optional dependency for python 2
+    try:
+        import scandir
+
+        return scandir.scandir
+    except ImportError:
+        return None
+
+def listDirectories(path):
+    """Returns the names of the directories in path.
+
+    Uses scandir if it's available. scandir can tell directories by the
+    directory entry's type in most cases so no stat call is required.
+    """
+
+    scandir = _getScandir()
+
+    if scandir is None:
+        return [name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))]
+
+    return [e.name for e in scandir(path) if e.is_dir()]
+
 def createSystem():
-    return System(open = open, pathExists = os.path.exists)
+    return System(open = open, pathExists = os.path.exists, stat = os.stat, listDirectories = listDirectories, isDirectory = os.path.isdir)
 
 class System(object):
     '''Abstraction layer for system access.
@@ -27,6 +56,9 @@ class System(object):
     This class can be used to mock system access in tests.
     '''
 
-    def __init__(self, open = None, pathExists = None):
+    def __init__(self, open = None, pathExists = None, stat = None, listDirectories = None, isDirectory = None):
         self.open = open
         self.pathExists = pathExists
+        self.stat = stat
+        self.listDirectories = listDirectories
+        self.isDirectory = isDirectory
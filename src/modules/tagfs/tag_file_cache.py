@@ -0,0 +1,128 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import logging
+import marshal
+import os
+
+from item_access import Tag, parseTagsFromFile
+
+class TagFileCache(object):
+    """Persistent cache for the parsed contents of tag files.
+
+    Every cached tag file is stored together with it's stat signature
+    (modification time, size and inode). Tag files are only parsed again
+    when their signature changed since the cache has been saved.
+
+    The cache is stored in the marshal format as tag values are byte strings
+    which may not be valid unicode.
+    """
+
+    VERSION = 1
+
+    def __init__(self, system, cacheFileName, parseTagsFromFile = parseTagsFromFile):
+        self.system = system
+        self.cacheFileName = cacheFileName
+        self._parseTagsFromFile = parseTagsFromFile
+        self.cachedTagFiles = {}
+        self.usedTagFiles = {}
+        self.dirty = False
+
+    def load(self):
+        if not self.system.pathExists(self.cacheFileName):
+            return
+
+        try:
+            with self.system.open(self.cacheFileName, 'rb') as f:
+                data = marshal.loads(f.read())
+
+            if data['version'] != TagFileCache.VERSION:
+                logging.info('Ignoring tag file cache %s with version %s', self.cacheFileName, data['version'])
+
+                return
+
+            self.cachedTagFiles = data['tagFiles']
+        except (IOError, EOFError, ValueError, TypeError, KeyError), e:
+            logging.warn('Can\'t load tag file cache %s: %s', self.cacheFileName, e)
+
+            return
+
+        logging.debug('Loaded %s tag files from cache %s', len(self.cachedTagFiles), self.cacheFileName)
+
+    def save(self):
+        """Saves all tag files which have been parsed since the cache was
+        loaded.
+
+        Tag files which have not been requested, for example because their
+        item was deleted, are not saved.
+        """
+
+        if not self.dirty:
+            return
+
+        tmpFileName = self.cacheFileName + '.tmp'
+
+        try:
+            with self.system.open(tmpFileName, 'wb') as f:
+                f.write(marshal.dumps({
+                            'version': TagFileCache.VERSION,
+                            'tagFiles': self.usedTagFiles,
+                            }))
+
+            os.rename(tmpFileName, self.cacheFileName)
+        except (IOError, OSError), e:
+            logging.warn('Can\'t save tag file cache %s: %s', self.cacheFileName, e)
+
+            return
+
+        self.dirty = False
+
+        logging.debug('Saved %s tag files to cache %s', len(self.usedTagFiles), self.cacheFileName)
+
+    def _getSignature(self, tagFileName, tagFileStat):
+        s = tagFileStat
+
+        if s is None:
+            s = self.system.stat(tagFileName)
+
+        return (s.st_mtime, s.st_size, s.st_ino)
+
+    def parseTagsFromFile(self, system, tagFileName, tagFileStat = None):
+        """Replacement for item_access.parseTagsFromFile which returns the
+        cached tags if the tag file did not change.
+
+        The tag file is only stat'ed if tagFileStat is not given.
+        """
+
+        signature = self._getSignature(tagFileName, tagFileStat)
+
+        cachedTagFile = self.cachedTagFiles.get(tagFileName)
+        if not cachedTagFile is None and cachedTagFile[0] == signature:
+            self.usedTagFiles[tagFileName] = cachedTagFile
+
+            return set([Tag(value, context) for context, value in cachedTagFile[1]])
+
+        tags = self._parseTagsFromFile(system, tagFileName)
+
+        cachedTagFile = (signature, [(t.context, t.value) for t in tags])
+        self.cachedTagFiles[tagFileName] = cachedTagFile
+        self.usedTagFiles[tagFileName] = cachedTagFile
+        self.dirty = True
+
+        return tags
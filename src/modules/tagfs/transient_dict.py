@@ -17,77 +17,169 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import threading
+from cache import CacheStatistics
+
+# indices of the fields in a link of the usage list
+PREVIOUS, NEXT, KEY, VALUE = 0, 1, 2, 3
+
 class TransientDict(object):
+    """Dictionary which keeps at most capacity values.
+
+    When the capacity is exceeded the least recently used value is dropped.
+    All operations take constant time.
 
-    class Version(object):
-        
-        def __init__(self, key):
-            self.key = key
+    The keys are kept in a circular doubly linked usage list. The links are
+    [previous, next, key, value] lists. The least recently used link follows
+    the root link and the most recently used link precedes it.
 
-        def touch(self, version):
-            self.version = version
+    A dictionary with a capacity of 0 or less stores no values at all.
+    """
 
-    class Value(object):
-        
-        def __init__(self, value, version):
-            self.value = value
-            self.version = version
+    def __init__(self, capacity, statistics = None):
+        self.capacity = capacity
 
-    def __init__(self, averageCapacity):
-        self.averageCapacity = averageCapacity
-        self.nextVersion = 0
-        self.setCounter = 0
+        # maps the keys to their links
         self.data = {}
-        self.versions = []
+
+        self.root = []
+        self.root[:] = [self.root, self.root, None, None]
+
+        if statistics is None:
+            statistics = CacheStatistics(None)
+
+        self.statistics = statistics
+        self.statistics.getEntries = lambda: len(self.data)
+
+    def get(self, k, default = None):
+        """Returns the value for k or default if k is not cached.
+
+        Contrary to __getitem__ the lookup is counted as cache hit or miss.
+        """
+
+        if not k in self.data:
+            self.statistics.misses += 1
+
+            return default
+
+        self.statistics.hits += 1
+
+        return self[k]
+
+    def lookup(self, k, default = None):
+        """Returns the value for k or default if k is not cached.
+
+        Like __getitem__ the lookup is not counted as cache hit or miss.
+        """
+
+        link = self.data.get(k)
+
+        if link is None:
+            return default
+
+        self._moveToEnd(link)
+
+        return link[VALUE]
+
+    def _moveToEnd(self, link):
+        # unlink
+        previous, next = link[PREVIOUS], link[NEXT]
+        previous[NEXT] = next
+        next[PREVIOUS] = previous
+
+        # link before root
+        root = self.root
+        last = root[PREVIOUS]
+        last[NEXT] = root[PREVIOUS] = link
+        link[PREVIOUS] = last
+        link[NEXT] = root
     
     def __getitem__(self, k):
-        v = self.data[k]
+        link = self.data[k]
+
+        self._moveToEnd(link)
+
+        return link[VALUE]
+
+    def __setitem__(self, k, v):
+        data = self.data
 
-        if not v:
-            return None
+        link = data.get(k)
+        if not link is None:
+            link[VALUE] = v
 
-        v.version.touch(self.nextVersion)
-        self.nextVersion += 1
+            self._moveToEnd(link)
 
-        return v.value
+            return
 
-    def _cleanUpCache(self):
-        if len(self.data) < self.averageCapacity:
+        if self.capacity <= 0:
             return
 
-        def versionCmp(a, b):
-            if a.version < b.version:
-                return 1
-            if b.version < a.version:
-                return -1
+        root = self.root
 
-            return 0
+        if len(data) >= self.capacity:
+            # drop the least recently used link
+            oldest = root[NEXT]
+            next = oldest[NEXT]
+            root[NEXT] = next
+            next[PREVIOUS] = root
 
-        self.versions.sort(versionCmp)
+            del data[oldest[KEY]]
 
-        while len(self.versions) > self.averageCapacity:
-            version = self.versions.pop()
+            self.statistics.evictions += 1
 
-            self.data.pop(version.key)
+        last = root[PREVIOUS]
+        link = [last, root, k, v]
+        last[NEXT] = root[PREVIOUS] = data[k] = link
 
-    def __setitem__(self, k, v):
-        if k in self.data:
-            value = self.data[k]
+    def items(self):
+        """Returns the (key, value) pairs. The least recently used pair
+        comes first.
+        """
 
-            value.value = v
-        else:
-            self.setCounter += 1
-            if self.setCounter % self.averageCapacity == 0:
-                self._cleanUpCache()
+        items = []
 
-            version = TransientDict.Version(k)
-            self.versions.append(version)
+        link = self.root[NEXT]
+        while not link is self.root:
+            items.append((link[KEY], link[VALUE]))
 
-            value = TransientDict.Value(v, version)
-            self.data[k] = value
+            link = link[NEXT]
 
-        value.version.touch(self.nextVersion)
-        self.nextVersion += 1
+        return items
 
     def __contains__(self, k):
         return k in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+class SynchronizedTransientDict(TransientDict):
+    """TransientDict which can be accessed from multiple threads.
+
+    Every lookup changes the usage list. So even lookups are serialized.
+    """
+
+    def __init__(self, capacity, statistics = None):
+        super(SynchronizedTransientDict, self).__init__(capacity, statistics)
+
+        self.lock = threading.RLock()
+
+    def get(self, k, default = None):
+        with self.lock:
+            return super(SynchronizedTransientDict, self).get(k, default)
+
+    def lookup(self, k, default = None):
+        with self.lock:
+            return super(SynchronizedTransientDict, self).lookup(k, default)
+
+    def __getitem__(self, k):
+        with self.lock:
+            return super(SynchronizedTransientDict, self).__getitem__(k)
+
+    def __setitem__(self, k, v):
+        with self.lock:
+            super(SynchronizedTransientDict, self).__setitem__(k, v)
+
+    def items(self):
+        with self.lock:
+            return super(SynchronizedTransientDict, self).items()
@@ -21,10 +21,12 @@
 import errno
 import logging
 import os
+import threading
+from cache import cachedProperty, getStatistics
 from log import logCall, logException
-from cache import cache
-from transient_dict import TransientDict
+from transient_dict import TransientDict, SynchronizedTransientDict
 from node_root import RootDirectoryNode
+from item_watcher import ItemWatcherStub
 from fuse import Direntry
 
 class View(object):
@@ -42,23 +44,103 @@ class View(object):
         'AppRun': None
         }
     
-    def __init__(self, itemAccess, config):
+    def __init__(self, itemAccess, config, itemWatcher = ItemWatcherStub()):
         self.itemAccess = itemAccess
         self.config = config
-        self._entryCache = TransientDict(100)
+        self.itemWatcher = itemWatcher
 
-    @property
-    @cache
+        # only one thread applies the item changes at a time
+        self._itemChangesLock = threading.Lock()
+
+        self._entryCache = self._createEntryCache()
+        self._missingPathCache = self._createMissingPathCache()
+        self._generation = itemAccess.generation
+
+    def _createPathCache(self, capacity, statistics):
+        if self.config.enableMultithreading:
+            return SynchronizedTransientDict(capacity, statistics)
+
+        return TransientDict(capacity, statistics)
+
+    def _createEntryCache(self):
+        return self._createPathCache(self.config.pathCacheSize, getStatistics('tagfs.view.View._entryCache'))
+
+    def _createMissingPathCache(self):
+        return self._createPathCache(self.config.missingPathCacheSize, getStatistics('tagfs.view.View._missingPathCache'))
+
+    @cachedProperty
     def rootNode(self):
         return RootDirectoryNode(self.itemAccess, self.config)
 
+    def _applyItemChanges(self):
+        # requests which arrive while another thread applies the changes
+        # don't wait for it
+        if not self._itemChangesLock.acquire(False):
+            return
+
+        try:
+            self.itemWatcher.processEvents()
+            self.itemAccess.validateItems()
+
+            if self._generation == self.itemAccess.generation:
+                return
+
+            # the nodes' cached values are recalculated on demand. only the
+            # cached paths have to be dropped as they may point to removed
+            # nodes or missing paths may exist now.
+            self._generation = self.itemAccess.generation
+            self._entryCache = self._createEntryCache()
+            self._missingPathCache = self._createMissingPathCache()
+        finally:
+            self._itemChangesLock.release()
+
+    def _getDeepestCachedAncestor(self, segments, entryCache, missingPathCache):
+        """Returns the node of the deepest cached ancestor path and the number
+        of path segments it covers.
+
+        The root node is returned if no ancestor is cached. None is returned
+        if an ancestor path is known to be missing.
+        """
+
+        for i in xrange(len(segments) - 1, 0, -1):
+            ancestorPath = '/' + '/'.join(segments[:i])
+
+            node = entryCache.lookup(ancestorPath)
+            if not node is None:
+                return node, i
+
+            if ancestorPath in missingPathCache:
+                return None, i
+
+        return self.rootNode, 0
+
     def getNode(self, path):
-        if path in self._entryCache:
-            # simple path name based caching is implemented here
+        return self._getNodeAndEntryCache(path)[0]
+
+    def _getNodeAndEntryCache(self, path):
+        """Returns the node for path together with the path cache which
+        belongs to the items the node was resolved from.
+        """
+
+        self._applyItemChanges()
 
+        # the caches are replaced when the items change. a node resolved from
+        # the old items must not end up in the new caches.
+        entryCache = self._entryCache
+        missingPathCache = self._missingPathCache
+
+        # simple path name based caching is implemented here
+        e = entryCache.get(path)
+
+        if not e is None:
             logging.debug('tagfs _entryCache hit')
 
-            return self._entryCache[path]
+            return e, entryCache
+
+        if missingPathCache.get(path):
+            logging.debug('tagfs _missingPathCache hit')
+
+            return None, entryCache
 
         # ps contains the path segments
         ps = [x for x in os.path.normpath(path).split(os.sep) if x != '']
@@ -70,28 +152,34 @@ class View(object):
             if lastSegment in View.DEFAULT_NODES:
                 logging.debug('Using default node for path ' + path)
 
-                return View.DEFAULT_NODES[lastSegment]
+                return View.DEFAULT_NODES[lastSegment], entryCache
+
+        segments = [pe for pe in path.split('/') if pe != '']
 
-        e = self.rootNode
+        e, resolvedSegmentsCount = self._getDeepestCachedAncestor(segments, entryCache, missingPathCache)
 
-        for pe in path.split('/')[1:]:
-            if pe == '':
-                continue
+        if e is None:
+            missingPathCache[path] = True
 
+            return None, entryCache
+
+        for pe in segments[resolvedSegmentsCount:]:
             entries = e.entries
 
             if not pe in entries:
                 # it seems like we are trying to fetch a node for an illegal
                 # path
 
-                return None
+                missingPathCache[path] = True
+
+                return None, entryCache
 
             e = entries[pe]
 
         logging.debug('tagfs _entryCache miss')
-        self._entryCache[path] = e
+        entryCache[path] = e
 
-        return e
+        return e, entryCache
 
     @logCall
     def getattr(self, path):
@@ -106,16 +194,49 @@ class View(object):
 
     @logCall
     def readdir(self, path, offset):
-        e = self.getNode(path)
+        e, entryCache = self._getNodeAndEntryCache(path)
 
         if not e:
             logging.warn('Try to read not existing directory: ' + path)
 
             return -errno.ENOENT
 
-        # TODO care about offset parameter
+        return self._createDirentries(path, e, offset, entryCache)
+
+    def _createDirentries(self, path, node, offset, entryCache):
+        """Yields the directory entries of node starting at offset.
 
-        return [Direntry(name) for name in e.entries.iterkeys()]
+        Each entry's offset is the offset of the next entry. So the kernel
+        can continue listing large directories where the last readdir call
+        stopped. The entries are created while fuse consumes them.
+
+        The listed nodes are put into entryCache as the kernel usually asks
+        for their attributes next. Directories with more entries than half of
+        the cache's capacity are not put into the cache. Otherwise they would
+        evict the cached ancestor paths which speed up path lookups. The
+        generator runs after readdir returned.
+        So the cache is passed in instead of being read when the caches may
+        already have been replaced.
+        """
+
+        names, entries = node.sortedEntries
+
+        if len(names) > entryCache.capacity / 2:
+            entryCache = None
+
+        if path == '/':
+            parentPath = ''
+        else:
+            parentPath = path
+
+        for i in xrange(offset, len(names)):
+            name = names[i]
+            child = entries[name]
+
+            if not entryCache is None:
+                entryCache[parentPath + '/' + name] = child
+
+            yield Direntry(name, type = child.fileType, ino = child.ino, offset = i + 1)
 
     @logCall
     def readlink(self, path):
@@ -151,7 +272,11 @@ class View(object):
         return n.open(path, flags)
 
     @logCall
-    def read(self, path, len, offset):
+    def read(self, path, len, offset, fh = None):
+        if not fh is None:
+            # the file has been opened with it's own handle
+            return fh.read(len, offset)
+
         n = self.getNode(path)
 
         if not n:
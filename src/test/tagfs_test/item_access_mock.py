@@ -17,11 +17,58 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+from tagfs.item_facets import Facets
+from tagfs.item_set import ItemSet
 from tagfs_test.item_mock import ItemMock
 
 class ItemAccessMock(object):
 
     def __init__(self):
         self.parseTime = 42
-        self.taggedItems = []
-        self.untaggedItems = []
+        self.generation = 0
+        self._taggedItems = []
+        self._untaggedItems = []
+        self.itemsById = {}
+
+    def validateItems(self):
+        pass
+
+    def _createItemSet(self, items):
+        for item in items:
+            self.itemsById[item.id] = item
+
+        return ItemSet.fromIds(self.itemsById, [item.id for item in items])
+
+    @property
+    def taggedItems(self):
+        return self._createItemSet(self._taggedItems)
+
+    @taggedItems.setter
+    def taggedItems(self, items):
+        self._taggedItems = items
+
+    @property
+    def untaggedItems(self):
+        return self._createItemSet(self._untaggedItems)
+
+    @untaggedItems.setter
+    def untaggedItems(self, items):
+        self._untaggedItems = items
+
+    def _getItemsByTag(self, isMatchingTag):
+        return self._createItemSet([item for item in self._taggedItems if len([t for t in item.tags if isMatchingTag(t)]) > 0])
+
+    def getItemsByContextValue(self, context, value):
+        return self._getItemsByTag(lambda t: t.context == context and t.value == value)
+
+    def getItemsByContext(self, context):
+        return self._getItemsByTag(lambda t: t.context == context)
+
+    def getItemsByValue(self, value):
+        return self._getItemsByTag(lambda t: t.value == value)
+
+    def getFilteredItems(self, filterKey, filterItems):
+        return filterItems()
+
+    def getFacets(self, filterKey, getItems):
+        return Facets(getItems())
@@ -17,11 +17,20 @@
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import itertools
+
+nextItemId = itertools.count()
+
 class ItemMock(object):
 
     def __init__(self, name, tags = []):
         self.name = name
         self.tags = tags
+        self.id = nextItemId.next()
+
+    @property
+    def tagged(self):
+        return not self.tags is None
 
 def createItemMocks(itemNames):
     return [ItemMock(name, []) for name in itemNames]
@@ -16,6 +16,8 @@
 # You should have received a copy of the GNU General Public License
 # along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
 
+import os.path
+
 class ReadLineFileMock(object):
 
     def __init__(self, lines):
@@ -27,11 +29,22 @@ class ReadLineFileMock(object):
     def __exit__(self, *args, **kwargs):
         pass
 
+class StatMock(object):
+
+    def __init__(self, st_mtime = 0, st_size = 0, st_ino = 0):
+        self.st_mtime = st_mtime
+        self.st_ctime = st_mtime
+        self.st_size = st_size
+        self.st_ino = st_ino
+
 class SystemMock(object):
 
     def __init__(self, test, readFiles = {}):
         self.test = test
         self.readFiles = readFiles
+        self.stats = {}
+        self.statedPaths = []
+        self.directories = set()
 
     def open(self, fileName, mode):
         if(mode == 'r'):
@@ -41,3 +54,17 @@ class SystemMock(object):
 
     def pathExists(self, path):
         return path in self.readFiles
+
+    def stat(self, path):
+        self.statedPaths.append(path)
+
+        if not path in self.readFiles:
+            raise OSError(2, 'No such file or directory', path)
+
+        return self.stats.get(path, StatMock())
+
+    def listDirectories(self, path):
+        return [os.path.basename(d) for d in self.directories if os.path.dirname(d) == path]
+
+    def isDirectory(self, path):
+        return path in self.directories
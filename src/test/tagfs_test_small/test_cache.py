@@ -0,0 +1,316 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+import unittest
+
+import tagfs.cache as cache
+from tagfs.cache import cachedProperty, invalidate, GenerationReloadStrategy, StatReloadStrategy
+from systemMocks import StatMock
+
+class Counter(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    @cachedProperty
+    def value(self):
+        """Counts the calls."""
+
+        self.calls += 1
+
+        return self.calls
+
+    @cachedProperty
+    def otherValue(self):
+        return -self.value
+
+class Source(object):
+
+    def __init__(self):
+        self.generation = 0
+
+class GenerationCounter(object):
+
+    def __init__(self, source):
+        self.source = source
+        self.calls = 0
+
+    @cachedProperty.withReloadStrategy(GenerationReloadStrategy(lambda obj: obj.source.generation))
+    def value(self):
+        self.calls += 1
+
+        return self.calls
+
+class ClockMock(object):
+
+    def __init__(self):
+        self.time = 1000
+
+    def __call__(self):
+        return self.time
+
+class File(object):
+
+    def __init__(self):
+        self.stat = StatMock(st_mtime = 1, st_size = 10, st_ino = 100)
+        self.statCalls = 0
+        self.calls = 0
+
+    def getStat(self):
+        self.statCalls += 1
+
+        return self.stat
+
+clock = ClockMock()
+
+statReloadStrategy = StatReloadStrategy(lambda obj: obj.getStat(), lambda obj: 10, now = clock)
+
+class FileCounter(File):
+
+    @cachedProperty.withReloadStrategy(statReloadStrategy)
+    def value(self):
+        self.calls += 1
+
+        return self.calls
+
+class TestCachedProperty(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedProperty, self).setUp()
+
+        self.counter = Counter()
+
+    def testValueIsCalculatedOnce(self):
+        self.assertEqual(1, self.counter.value)
+        self.assertEqual(1, self.counter.value)
+        self.assertEqual(1, self.counter.calls)
+
+    def testDocIsKept(self):
+        self.assertEqual('Counts the calls.', Counter.value.__doc__)
+
+    def testInvalidateDropsNamedValue(self):
+        self.counter.value
+        self.counter.otherValue
+
+        invalidate(self.counter, 'value')
+
+        self.assertEqual(2, self.counter.value)
+        self.assertEqual(-1, self.counter.otherValue)
+
+    def testInvalidateWithoutNamesDropsAllValues(self):
+        self.counter.value
+        self.counter.otherValue
+
+        invalidate(self.counter)
+
+        self.assertEqual(-2, self.counter.otherValue)
+
+    def testInvalidateIgnoresUncachedValues(self):
+        invalidate(self.counter, 'value')
+
+        self.assertEqual(1, self.counter.value)
+
+class TestCachedPropertyWithGenerationReloadStrategy(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedPropertyWithGenerationReloadStrategy, self).setUp()
+
+        self.source = Source()
+        self.counter = GenerationCounter(self.source)
+
+    def testValueIsCachedWithinGeneration(self):
+        self.assertEqual(1, self.counter.value)
+        self.assertEqual(1, self.counter.value)
+
+    def testValueIsRecalculatedForNewGeneration(self):
+        self.counter.value
+
+        self.source.generation += 1
+
+        self.assertEqual(2, self.counter.value)
+        self.assertEqual(2, self.counter.value)
+
+    def testInvalidateDropsStampedValue(self):
+        self.counter.value
+
+        invalidate(self.counter, 'value')
+
+        self.assertEqual(2, self.counter.value)
+
+class TestCachedPropertyWithStatReloadStrategy(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedPropertyWithStatReloadStrategy, self).setUp()
+
+        self.counter = FileCounter()
+        self.counter.value
+
+    def testFileIsStatedOncePerInterval(self):
+        self.counter.value
+        self.counter.value
+
+        self.assertEqual(1, self.counter.statCalls)
+
+    def testChangedFileIsIgnoredWithinInterval(self):
+        self.counter.stat = StatMock(st_mtime = 2, st_size = 10, st_ino = 100)
+
+        self.assertEqual(1, self.counter.value)
+
+    def testUnchangedFileKeepsValueAfterInterval(self):
+        clock.time += 10
+
+        self.assertEqual(1, self.counter.value)
+        self.assertEqual(2, self.counter.statCalls)
+
+    def testChangedFileRecalculatesValueAfterInterval(self):
+        self.counter.stat = StatMock(st_mtime = 1, st_size = 11, st_ino = 100)
+        clock.time += 10
+
+        self.assertEqual(2, self.counter.value)
+
+    def testRemovedFileRecalculatesValueAfterInterval(self):
+        self.counter.stat = None
+        clock.time += 10
+
+        self.assertEqual(2, self.counter.value)
+
+    def testResetForcesStat(self):
+        statReloadStrategy.reset(self.counter)
+
+        self.counter.value
+
+        self.assertEqual(2, self.counter.statCalls)
+
+class StatisticsCounter(object):
+
+    @cachedProperty
+    def value(self):
+        return 42
+
+class TestCachedPropertyStatistics(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedPropertyStatistics, self).setUp()
+
+        cache.enableStatistics()
+
+        self.counter = StatisticsCounter()
+        self.statistics = StatisticsCounter.value.getStatistics(StatisticsCounter)
+
+        self.hits = self.statistics.hits
+        self.misses = self.statistics.misses
+
+    def tearDown(self):
+        cache.statisticsEnabled = False
+
+        super(TestCachedPropertyStatistics, self).tearDown()
+
+    def testStatisticsAreNamedAfterOwningClass(self):
+        self.assertTrue(self.statistics.name.endswith('.StatisticsCounter.value'))
+        self.assertTrue(cache.statistics[self.statistics.name] is self.statistics)
+
+    def testHitsAndMissesAreCounted(self):
+        self.counter.value
+        self.counter.value
+        self.counter.value
+
+        self.assertEqual(self.misses + 1, self.statistics.misses)
+        self.assertEqual(self.hits + 2, self.statistics.hits)
+
+    def testEntriesAreCounted(self):
+        self.counter.value
+
+        self.assertTrue(self.counter in StatisticsCounter.value._cachingObjects)
+
+        invalidate(self.counter)
+
+        self.assertFalse(self.counter in StatisticsCounter.value._cachingObjects)
+
+class BlockingCounter(object):
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    @cachedProperty
+    def value(self):
+        self.calls += 1
+
+        self.started.set()
+        self.release.wait()
+
+        return self.calls
+
+class TestCachedPropertyThreadSafety(unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedPropertyThreadSafety, self).setUp()
+
+        cache.enableThreadSafety()
+
+        self.counter = BlockingCounter()
+
+    def tearDown(self):
+        cache.threadSafe = False
+
+        super(TestCachedPropertyThreadSafety, self).tearDown()
+
+    def testConcurrentMissesCalculateOnce(self):
+        values = []
+
+        def readValue():
+            values.append(self.counter.value)
+
+        threads = [threading.Thread(target = readValue) for i in range(3)]
+
+        for thread in threads:
+            thread.start()
+
+        self.counter.started.wait()
+        self.counter.release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, self.counter.calls)
+        self.assertEqual([1, 1, 1], values)
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSingleFlight, self).setUp()
+
+        self.singleFlight = cache.SingleFlight()
+
+    def testResultIsReturned(self):
+        self.assertEqual(42, self.singleFlight.run('key', lambda: 42))
+
+    def testFinishedCalculationIsRunAgain(self):
+        self.singleFlight.run('key', lambda: 1)
+
+        self.assertEqual(2, self.singleFlight.run('key', lambda: 2))
+
+    def testErrorIsRaised(self):
+        def fail():
+            raise IOError('failed')
+
+        self.assertRaises(IOError, self.singleFlight.run, 'key', fail)
+        self.assertEqual({}, self.singleFlight.flights)
@@ -51,10 +51,15 @@ class TaggedItemMock(ItemMock):
         else:
             return []
 
+class FilterNodeMock(object):
+
+    filters = frozenset()
+
 class ParentNodeMock(object):
 
     def __init__(self, items):
         self.items = items
+        self.parentNode = FilterNodeMock()
 
 class ConfigMock(object):
 
@@ -62,6 +67,14 @@ class ConfigMock(object):
     def enableValueFilters(self):
         return False
 
+    @property
+    def enableRecursionPruning(self):
+        return False
+
+    @property
+    def maxFilterDepth(self):
+        return 0
+
 class TestContextValueFilterDirectoryNode(TestCase):
 
     def setUp(self):
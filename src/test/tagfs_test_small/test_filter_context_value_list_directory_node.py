@@ -27,7 +27,7 @@ from tagfs_test.item_mock import createItemMocks
 
 class ParentNodeMock(object):
 
-    pass
+    filterKey = ()
 
 class TestContextValueListDirectoryNode(TestCase):
 
@@ -0,0 +1,140 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tagfs import sysIO
+import tagfs.freebase_support as freebase_support
+
+class FreebaseAdapterMock(object):
+
+    def __init__(self):
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query.cacheKey)
+
+        return {'name': [query.queryObject['id'], ], }
+
+class ClockMock(object):
+
+    def __init__(self):
+        self.time = 1000
+
+    def __call__(self):
+        return self.time
+
+def createQuery(id):
+    return freebase_support.Query({'id': id, 'name': None, })
+
+class AbstractCachingFreebaseAdapterTest(unittest.TestCase):
+
+    def setUp(self):
+        super(AbstractCachingFreebaseAdapterTest, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.cacheFileName = os.path.join(self.directory, 'freebase_cache')
+
+        self.adapter = FreebaseAdapterMock()
+        self.clock = ClockMock()
+
+        self.cachingAdapter = self.createCachingAdapter()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+        super(AbstractCachingFreebaseAdapterTest, self).tearDown()
+
+    def createCachingAdapter(self):
+        return freebase_support.CachingFreebaseAdapter(sysIO.createSystem(), self.adapter, self.cacheFileName, 60, 2, now = self.clock)
+
+class TestCachingFreebaseAdapter(AbstractCachingFreebaseAdapterTest):
+
+    def testIdenticalQueriesAreExecutedOnce(self):
+        self.assertEqual({'name': ['/m/1', ], }, self.cachingAdapter.execute(createQuery('/m/1')))
+        self.assertEqual({'name': ['/m/1', ], }, self.cachingAdapter.execute(createQuery('/m/1')))
+
+        self.assertEqual(1, len(self.adapter.queries))
+
+    def testExpiredResultsAreQueriedAgain(self):
+        self.cachingAdapter.execute(createQuery('/m/1'))
+
+        self.clock.time += 61
+        self.cachingAdapter.execute(createQuery('/m/1'))
+
+        self.assertEqual(2, len(self.adapter.queries))
+
+    def testOldestResultIsEvicted(self):
+        self.cachingAdapter.execute(createQuery('/m/1'))
+        self.cachingAdapter.execute(createQuery('/m/2'))
+        self.cachingAdapter.execute(createQuery('/m/3'))
+
+        self.cachingAdapter.execute(createQuery('/m/3'))
+        self.cachingAdapter.execute(createQuery('/m/1'))
+
+        self.assertEqual(4, len(self.adapter.queries))
+
+    def testRecentlyUsedResultIsKept(self):
+        self.cachingAdapter.execute(createQuery('/m/1'))
+        self.cachingAdapter.execute(createQuery('/m/2'))
+        self.cachingAdapter.execute(createQuery('/m/1'))
+        self.cachingAdapter.execute(createQuery('/m/3'))
+
+        self.cachingAdapter.execute(createQuery('/m/1'))
+
+        self.assertEqual(3, len(self.adapter.queries))
+
+    def testSavedResultsAreUsedAfterLoad(self):
+        self.cachingAdapter.execute(createQuery('/m/1'))
+        self.cachingAdapter.save()
+
+        cachingAdapter = self.createCachingAdapter()
+        cachingAdapter.load()
+
+        self.assertEqual({'name': ['/m/1', ], }, cachingAdapter.execute(createQuery('/m/1')))
+        self.assertEqual(1, len(self.adapter.queries))
+
+    def testLoadKeepsMostRecentlyUsedResults(self):
+        for id in ['/m/1', '/m/2', '/m/3', ]:
+            self.cachingAdapter.execute(createQuery(id))
+        self.cachingAdapter.save()
+
+        cachingAdapter = freebase_support.CachingFreebaseAdapter(sysIO.createSystem(), self.adapter, self.cacheFileName, 60, 1, now = self.clock)
+        cachingAdapter.load()
+
+        cachingAdapter.execute(createQuery('/m/3'))
+
+        self.assertEqual(3, len(self.adapter.queries))
+
+class TestQueryCacheKey(unittest.TestCase):
+
+    def testCacheKeyIsIndependentOfKeyOrder(self):
+        a = freebase_support.QueryParser().parse('{"id": "/m/1", "name": null}')
+        b = freebase_support.QueryParser().parse('{"name": null, "id": "/m/1"}')
+
+        self.assertEqual(a.cacheKey, b.cacheKey)
+
+    def testSelectedKeyAndEmptyListHaveDifferentCacheKeys(self):
+        a = freebase_support.QueryParser().parse('{"id": "/m/1", "name": null}')
+        b = freebase_support.QueryParser().parse('{"id": "/m/1", "name": []}')
+
+        self.assertNotEqual(a.cacheKey, b.cacheKey)
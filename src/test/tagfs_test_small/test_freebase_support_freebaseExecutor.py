@@ -0,0 +1,145 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import threading
+import unittest
+
+import tagfs.freebase_support as freebase_support
+
+class FreebaseAdapterMock(object):
+
+    def __init__(self):
+        self.queries = []
+        self.failingIds = set()
+        self.blockingIds = set()
+        self.unblocked = threading.Event()
+
+        self.lock = threading.Lock()
+
+    def execute(self, query):
+        id = query.queryObject['id']
+
+        with self.lock:
+            self.queries.append(id)
+
+        if id in self.blockingIds:
+            self.unblocked.wait()
+
+        if id in self.failingIds:
+            raise Exception('freebase is not available')
+
+        return {'name': [id, ], }
+
+class ClockMock(object):
+
+    def __init__(self):
+        self.time = 1000
+
+    def __call__(self):
+        return self.time
+
+def createQuery(id):
+    return freebase_support.Query({'id': id, 'name': None, })
+
+class TestFreebaseExecutor(unittest.TestCase):
+
+    def setUp(self):
+        super(TestFreebaseExecutor, self).setUp()
+
+        self.adapter = FreebaseAdapterMock()
+        self.clock = ClockMock()
+
+        self.executor = freebase_support.FreebaseExecutor(self.adapter, 4, 1, 60, now = self.clock)
+
+    def tearDown(self):
+        self.adapter.unblocked.set()
+
+        super(TestFreebaseExecutor, self).tearDown()
+
+    def testPrefetchExecutesDuplicateQueriesOnce(self):
+        self.executor.prefetch([createQuery('/m/1'), createQuery('/m/2'), createQuery('/m/1'), ])
+
+        self.assertEqual(['/m/1', '/m/2', ], sorted(self.adapter.queries))
+
+    def testExecuteReturnsPrefetchedResult(self):
+        self.executor.prefetch([createQuery('/m/1'), ])
+
+        self.assertEqual({'name': ['/m/1', ], }, self.executor.execute(createQuery('/m/1')))
+        self.assertEqual(['/m/1', ], self.adapter.queries)
+
+    def testReleasedResultsAreExecutedAgain(self):
+        self.executor.prefetch([createQuery('/m/1'), ])
+        self.executor.releasePrefetched()
+
+        self.assertEqual({'name': ['/m/1', ], }, self.executor.execute(createQuery('/m/1')))
+        self.assertEqual(['/m/1', '/m/1', ], self.adapter.queries)
+
+    def testRunningQueryIsShared(self):
+        self.adapter.blockingIds.add('/m/1')
+
+        asyncResult = self.executor._submit(createQuery('/m/1'))
+
+        self.assertTrue(asyncResult is self.executor._submit(createQuery('/m/1')))
+
+        self.adapter.unblocked.set()
+
+        self.assertEqual({'name': ['/m/1', ], }, self.executor.execute(createQuery('/m/1')))
+        self.assertEqual(['/m/1', ], self.adapter.queries)
+
+    def testExecutorWithoutThreadsUsesOneThread(self):
+        executor = freebase_support.FreebaseExecutor(self.adapter, 0, 1, 60, now = self.clock)
+
+        executor.prefetch([createQuery('/m/1'), ])
+
+        self.assertEqual(['/m/1', ], self.adapter.queries)
+
+    def testFinishedQueriesAreNotKept(self):
+        self.executor.prefetch([createQuery('/m/1'), createQuery('/m/2'), ])
+        self.executor.execute(createQuery('/m/3'))
+
+        self.assertEqual({}, self.executor.inFlight)
+
+    def testExecuteQueriesNotPrefetchedQuery(self):
+        self.assertEqual({'name': ['/m/1', ], }, self.executor.execute(createQuery('/m/1')))
+
+    def testFailedQueryIsNotRetriedBeforeFailureTimeout(self):
+        self.adapter.failingIds.add('/m/1')
+
+        self.executor.prefetch([createQuery('/m/1'), ])
+
+        self.assertRaises(freebase_support.FreebaseQueryFailed, self.executor.execute, createQuery('/m/1'))
+        self.assertEqual(['/m/1', ], self.adapter.queries)
+
+    def testFailedQueryIsRetriedAfterFailureTimeout(self):
+        self.adapter.failingIds.add('/m/1')
+
+        self.executor.prefetch([createQuery('/m/1'), ])
+
+        self.adapter.failingIds.remove('/m/1')
+        self.clock.time += 60
+
+        self.assertEqual({'name': ['/m/1', ], }, self.executor.execute(createQuery('/m/1')))
+
+    def testTimedOutQueryFails(self):
+        self.adapter.blockingIds.add('/m/1')
+
+        self.executor.prefetch([createQuery('/m/1'), createQuery('/m/2'), ])
+
+        self.assertRaises(freebase_support.FreebaseQueryFailed, self.executor.execute, createQuery('/m/1'))
+        self.assertEqual({'name': ['/m/2', ], }, self.executor.execute(createQuery('/m/2')))
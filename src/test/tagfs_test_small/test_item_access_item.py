@@ -19,6 +19,7 @@
 import unittest
 
 import tagfs.item_access as item_access
+from tagfs.tag_file_cache import TagFileCache
 import systemMocks
 
 class ItemAccessMock(object):
@@ -26,6 +27,7 @@ class ItemAccessMock(object):
     def __init__(self, dataDirectory, tagFileName):
         self.dataDirectory = dataDirectory
         self.tagFileName = tagFileName
+        self.tagFileCheckInterval = None
 
 class FreebaseQueryParserMock(object):
 
@@ -61,3 +63,56 @@ class WhenItemHasFreebaseQueryTag(unittest.TestCase):
 
     def testThenItemHasFreebaseTaggingsFromItemAccess(self):
         self.assertEqual(list(self.item.getTagsByContext('freebaseContext')), [item_access.Tag('freebaseValue', 'freebaseContext'),])
+
+class WhenItemHasTagFile(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemHasTagFile, self).setUp()
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.system.readFiles['/path/to/my/data/directory/myItem/.tag'] = systemMocks.ReadLineFileMock(['value',])
+        self.system.stats['/path/to/my/data/directory/myItem/.tag'] = systemMocks.StatMock(st_mtime = 42)
+
+        self.itemAccess = ItemAccessMock('/path/to/my/data/directory', '.tag')
+
+        self.item = item_access.Item('myItem', self.system, self.itemAccess, FreebaseQueryParserMock(self), FreebaseAdapterMock(self))
+
+    def testThenItemIsTagged(self):
+        self.assertTrue(self.item.tagged)
+
+    def testThenTagsModificationTimeIsTagFileMTime(self):
+        self.assertEqual(42, self.item.tagsModificationTime)
+
+class WhenItemHasNoTagFile(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemHasNoTagFile, self).setUp()
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.itemAccess = ItemAccessMock('/path/to/my/data/directory', '.tag')
+
+        self.item = item_access.Item('myItem', self.system, self.itemAccess, FreebaseQueryParserMock(self), FreebaseAdapterMock(self))
+
+    def testThenItemIsNotTagged(self):
+        self.assertFalse(self.item.tagged)
+
+    def testThenItemHasNoTagsModificationTime(self):
+        self.assertEqual(None, self.item.tagsModificationTime)
+
+class WhenItemTagsAreCached(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemTagsAreCached, self).setUp()
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.system.readFiles['/path/to/my/data/directory/myItem/.tag'] = systemMocks.ReadLineFileMock(['value',])
+
+        self.itemAccess = ItemAccessMock('/path/to/my/data/directory', '.tag')
+        self.tagFileCache = TagFileCache(self.system, 'index')
+
+        self.item = item_access.Item('myItem', self.system, self.itemAccess, FreebaseQueryParserMock(self), FreebaseAdapterMock(self), parseTagsFromFile = self.tagFileCache.parseTagsFromFile)
+
+    def testThenTagFileIsStatedOnce(self):
+        self.assertEqual([item_access.Tag('value'), ], self.item.tags)
+
+        self.assertEqual(['/path/to/my/data/directory/myItem/.tag', ], self.system.statedPaths)
@@ -0,0 +1,299 @@
+#
+# Copyright 2012 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+import time
+import unittest
+
+import tagfs.item_access as item_access
+import tagfs.freebase_support as freebase_support
+import systemMocks
+
+class Calculation(object):
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+        return self.value
+
+class WhenFilteredItemsAreRequested(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenFilteredItemsAreRequested, self).setUp()
+
+        self.itemAccess = item_access.ItemAccess(systemMocks.SystemMock(self), '/path/to/my/data/directory', '.tag', None, None, [])
+
+        self.filterKey = (('contextValue', 'type', 'fruit', ), ('value', 'red', ), )
+
+    def testThenItemsAreCalculatedOncePerFilterKey(self):
+        calculation = Calculation(['apple', ])
+
+        self.itemAccess.getFilteredItems(self.filterKey, calculation)
+
+        self.assertEqual(['apple', ], self.itemAccess.getFilteredItems(self.filterKey, Calculation(None)))
+        self.assertEqual(1, calculation.calls)
+
+    def testThenItemsAreCalculatedAgainForNewGeneration(self):
+        self.itemAccess.getFilteredItems(self.filterKey, Calculation(['apple', ]))
+
+        self.itemAccess.generation += 1
+
+        self.assertEqual(['cherry', ], self.itemAccess.getFilteredItems(self.filterKey, Calculation(['cherry', ])))
+
+    def testThenFacetsAreCalculatedOncePerFilterKey(self):
+        calculation = Calculation([])
+
+        facets = self.itemAccess.getFacets(self.filterKey, calculation)
+
+        self.assertTrue(facets is self.itemAccess.getFacets(self.filterKey, Calculation(None)))
+        self.assertEqual(1, calculation.calls)
+
+class ItemsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(ItemsTestCase, self).setUp()
+
+        self.dataDirectory = '/path/to/my/data/directory'
+
+        self.system = systemMocks.SystemMock(self, {})
+
+        self.setTags('apple', ['fruit', ])
+        self.setTags('carrot', ['vegetable', ])
+
+        self.itemAccess = self.createItemAccess()
+
+        # the items are indexed before they change
+        self.index = self.itemAccess.index
+        self.generation = self.itemAccess.generation
+
+    def createItemAccess(self):
+        return item_access.ItemAccess(self.system, self.dataDirectory, '.tag', None, None, [])
+
+    def getTagFileName(self, itemName):
+        return '%s/%s/.tag' % (self.dataDirectory, itemName, )
+
+    def setTags(self, itemName, lines):
+        self.system.directories.add('%s/%s' % (self.dataDirectory, itemName, ))
+        self.system.readFiles[self.getTagFileName(itemName)] = systemMocks.ReadLineFileMock(lines)
+
+    def removeItemDirectory(self, itemName):
+        self.system.directories.discard('%s/%s' % (self.dataDirectory, itemName, ))
+        self.system.readFiles.pop(self.getTagFileName(itemName), None)
+
+    def assertItemNames(self, expectedItemNames, items):
+        self.assertEqual(set(expectedItemNames), set([item.name for item in items]))
+
+class WhenItemsAreReloaded(ItemsTestCase):
+
+    def testThenAddedItemIsIndexed(self):
+        self.setTags('banana', ['fruit', ])
+
+        self.itemAccess.reloadItem('banana')
+
+        self.assertTrue('banana' in self.itemAccess.items)
+        self.assertItemNames(['apple', 'banana', ], self.itemAccess.getItemsByValue('fruit'))
+        self.assertEqual(self.generation + 1, self.itemAccess.generation)
+
+    def testThenModifiedItemIsIndexedByNewTags(self):
+        self.setTags('apple', ['red', ])
+
+        self.itemAccess.reloadItem('apple')
+
+        self.assertItemNames([], self.itemAccess.getItemsByValue('fruit'))
+        self.assertItemNames(['apple', ], self.itemAccess.getItemsByValue('red'))
+        self.assertEqual(self.generation + 1, self.itemAccess.generation)
+
+    def testThenDeletedItemIsRemoved(self):
+        self.removeItemDirectory('apple')
+
+        self.itemAccess.reloadItem('apple')
+
+        self.assertFalse('apple' in self.itemAccess.items)
+        self.assertItemNames([], self.itemAccess.getItemsByValue('fruit'))
+        self.assertItemNames(['carrot', ], self.itemAccess.taggedItems)
+
+    def testThenRenamedItemIsIndexedByNewName(self):
+        self.removeItemDirectory('apple')
+        self.setTags('pear', ['fruit', ])
+
+        self.itemAccess.reloadItems(['apple', 'pear', ])
+
+        self.assertFalse('apple' in self.itemAccess.items)
+        self.assertItemNames(['pear', ], self.itemAccess.getItemsByValue('fruit'))
+        self.assertEqual(self.generation + 1, self.itemAccess.generation)
+
+    def testThenPreviousIndexIsNotChanged(self):
+        self.setTags('apple', ['red', ])
+
+        self.itemAccess.reloadItem('apple')
+
+        self.assertItemNames(['apple', ], self.index.getItemsByValue('fruit'))
+        self.assertFalse(self.index is self.itemAccess.index)
+
+class UnreadableFileMock(object):
+
+    def __enter__(self, *args, **kwargs):
+        raise IOError(13, 'Permission denied')
+
+    def __exit__(self, *args, **kwargs):
+        pass
+
+class WhenTagFilesAreValidated(ItemsTestCase):
+
+    def createItemAccess(self):
+        return item_access.ItemAccess(self.system, self.dataDirectory, '.tag', None, None, [], tagFileCheckInterval = 0.01)
+
+    def waitForInterval(self):
+        time.sleep(0.02)
+
+    def testThenChangedTagFileIsIndexedAfterInterval(self):
+        self.setTags('apple', ['red', ])
+        self.system.stats[self.getTagFileName('apple')] = systemMocks.StatMock(st_mtime = 42)
+
+        self.waitForInterval()
+        self.itemAccess.validateItems()
+
+        self.assertItemNames([], self.itemAccess.getItemsByValue('fruit'))
+        self.assertItemNames(['apple', ], self.itemAccess.getItemsByValue('red'))
+        self.assertEqual(self.generation + 1, self.itemAccess.generation)
+
+    def testThenUnchangedTagFilesKeepGeneration(self):
+        self.waitForInterval()
+        self.itemAccess.validateItems()
+
+        self.assertTrue(self.index is self.itemAccess.index)
+        self.assertEqual(self.generation, self.itemAccess.generation)
+
+    def testThenItemWithUnreadableTagFileIsRemoved(self):
+        self.system.readFiles[self.getTagFileName('apple')] = UnreadableFileMock()
+        self.system.stats[self.getTagFileName('apple')] = systemMocks.StatMock(st_mtime = 42)
+
+        self.waitForInterval()
+        self.itemAccess.validateItems()
+
+        self.assertFalse('apple' in self.itemAccess.items)
+        self.assertItemNames([], self.itemAccess.getItemsByValue('fruit'))
+        self.assertEqual(self.generation + 1, self.itemAccess.generation)
+
+class WhenTagFilesAreValidatedWithinInterval(ItemsTestCase):
+
+    def createItemAccess(self):
+        return item_access.ItemAccess(self.system, self.dataDirectory, '.tag', None, None, [], tagFileCheckInterval = 3600)
+
+    def testThenChangedTagFileIsNotIndexed(self):
+        self.itemAccess.validateItems()
+
+        self.setTags('apple', ['red', ])
+        self.system.stats[self.getTagFileName('apple')] = systemMocks.StatMock(st_mtime = 42)
+
+        self.itemAccess.validateItems()
+
+        self.assertItemNames(['apple', ], self.itemAccess.getItemsByValue('fruit'))
+        self.assertItemNames([], self.itemAccess.getItemsByValue('red'))
+        self.assertEqual(self.generation, self.itemAccess.generation)
+
+class FreebaseAdapterMock(object):
+
+    def __init__(self):
+        self.calls = []
+        self.prefetchedKeys = set()
+
+    def prefetch(self, queries):
+        self.calls.append('prefetch')
+
+        self.prefetchedKeys = set([query.cacheKey for query in queries])
+
+    def releasePrefetched(self):
+        self.calls.append('releasePrefetched')
+
+        self.prefetchedKeys = set()
+
+    def execute(self, query):
+        if query.cacheKey in self.prefetchedKeys:
+            self.calls.append('executePrefetched')
+        else:
+            self.calls.append('execute')
+
+        return {'name': ['Apple Inc.', ], }
+
+class WhenItemsWithFreebaseQueriesAreIndexed(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemsWithFreebaseQueriesAreIndexed, self).setUp()
+
+        self.system = systemMocks.SystemMock(self, {})
+
+        for itemName in ['apple', 'pear', ]:
+            self.system.directories.add('/path/to/my/data/directory/' + itemName)
+            self.system.readFiles['/path/to/my/data/directory/%s/.tag' % itemName] = systemMocks.ReadLineFileMock(['_freebase: {"id": "/m/1", "name": null}', ])
+
+        self.freebaseAdapter = FreebaseAdapterMock()
+
+        self.itemAccess = item_access.ItemAccess(self.system, '/path/to/my/data/directory', '.tag', freebase_support.QueryParser(), self.freebaseAdapter, [])
+
+    def testThenTagsAreBuiltFromPrefetchedResults(self):
+        self.assertEqual(2, len(self.itemAccess.index.getItemsByValue('Apple Inc.')))
+
+        self.assertEqual(['prefetch', 'executePrefetched', 'executePrefetched', 'releasePrefetched', ], self.freebaseAdapter.calls)
+
+class WhenItemsAreScanned(unittest.TestCase):
+
+    scanThreads = 0
+
+    def setUp(self):
+        super(WhenItemsAreScanned, self).setUp()
+
+        self.dataDirectory = '/path/to/my/data/directory'
+
+        self.system = systemMocks.SystemMock(self, {})
+
+        for i in range(100):
+            self.addItem('item%02d' % i, systemMocks.ReadLineFileMock(['value%s' % (i % 2), ]))
+
+        self.addItem('unreadable', UnreadableFileMock())
+        self.addItem('untagged', None)
+        self.system.directories.add(self.dataDirectory + '/.tagfs')
+
+        self.itemAccess = item_access.ItemAccess(self.system, self.dataDirectory, '.tag', None, None, [], scanThreads = self.scanThreads)
+
+    def addItem(self, itemName, tagFile):
+        self.system.directories.add('%s/%s' % (self.dataDirectory, itemName, ))
+
+        if not tagFile is None:
+            self.system.readFiles['%s/%s/.tag' % (self.dataDirectory, itemName, )] = tagFile
+
+    def testThenReadableItemsAreIndexed(self):
+        self.assertEqual(50, len(self.itemAccess.getItemsByValue('value0')))
+        self.assertEqual(50, len(self.itemAccess.getItemsByValue('value1')))
+        self.assertEqual(['untagged', ], [item.name for item in self.itemAccess.untaggedItems])
+
+    def testThenItemWithUnreadableTagFileIsRemoved(self):
+        self.assertFalse('unreadable' in self.itemAccess.items)
+        self.assertEqual(101, len(self.itemAccess.items))
+
+    def testThenConfigurationDirectoryIsNoItem(self):
+        self.assertFalse('.tagfs' in self.itemAccess.items)
+
+    def testThenItemIdsFollowItemNames(self):
+        self.assertEqual(sorted(self.itemAccess.items.iterkeys()), [item.name for item in self.itemAccess.itemsById])
+
+class WhenItemsAreScannedConcurrently(WhenItemsAreScanned):
+
+    scanThreads = 4
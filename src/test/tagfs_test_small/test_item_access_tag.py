@@ -34,3 +34,12 @@ class TagTest(TestCase):
 
     def testEqualTagsEqWhenContextStr(self):
         self.assertTrue(item_access.Tag('t', 'c').__eq__(item_access.Tag('t', 'c')))
+
+    def testEqualTagsAreSameInstance(self):
+        self.assertTrue(item_access.Tag('t', 'c') is item_access.Tag(' t', 'c '))
+
+    def testDifferentTagsAreNotEqual(self):
+        self.assertTrue(item_access.Tag('t', 'c') != item_access.Tag('t', None))
+
+    def testTagsHaveNoInstanceDict(self):
+        self.assertFalse(hasattr(item_access.Tag('t', 'c'), '__dict__'))
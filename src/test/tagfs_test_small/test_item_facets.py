@@ -0,0 +1,61 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from tagfs.item_access import Tag
+from tagfs.item_facets import Facets
+
+from tagfs_test.item_mock import ItemMock
+
+class TestFacets(unittest.TestCase):
+
+    def setUp(self):
+        self.apple = ItemMock('apple', [Tag('fruit', 'type'), Tag('red', 'color'), ])
+        self.banana = ItemMock('banana', [Tag('fruit', 'type'), Tag('yellow'), Tag('yellow', 'color'), ])
+        self.cherry = ItemMock('cherry', [Tag('berry', 'type'), Tag('red', 'color'), Tag('red', 'color'), ])
+
+        self.facets = Facets([self.apple, self.banana, self.cherry])
+
+    def testItemsAreCounted(self):
+        self.assertEqual(3, self.facets.itemsCount)
+
+    def testContextValuesAreCounted(self):
+        self.assertEqual(2, self.facets.getContextValueCount('type', 'fruit'))
+        self.assertEqual(1, self.facets.getContextValueCount('type', 'berry'))
+        self.assertEqual(0, self.facets.getContextValueCount('type', 'vegetable'))
+
+    def testItemIsCountedOnceForDuplicateTags(self):
+        self.assertEqual(2, self.facets.getContextValueCount('color', 'red'))
+
+    def testContextsAreCounted(self):
+        self.assertEqual(3, self.facets.getContextCount('color'))
+        self.assertEqual(0, self.facets.getContextCount('size'))
+
+    def testValuesAreCountedOncePerItem(self):
+        self.assertEqual(1, self.facets.getValueCount('yellow'))
+        self.assertEqual(2, self.facets.getValueCount('red'))
+
+    def testContextsExcludeContextlessTags(self):
+        self.assertEqual(set(['type', 'color']), set(self.facets.contexts))
+
+    def testValuesByContext(self):
+        self.assertEqual(set(['fruit', 'berry']), set(self.facets.getValuesByContext('type')))
+        self.assertEqual(set(['yellow']), set(self.facets.getValuesByContext(None)))
+        self.assertEqual(set(), set(self.facets.getValuesByContext('size')))
@@ -0,0 +1,102 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from tagfs.item_access import Tag
+from tagfs.item_index import ItemIndex
+
+from tagfs_test.item_mock import ItemMock
+
+class TestItemIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.apple = ItemMock('apple', [Tag('fruit', 'type'), Tag('red', 'color'), ])
+        self.banana = ItemMock('banana', [Tag('fruit', 'type'), Tag('yellow')])
+
+        self.carrot = ItemMock('carrot', None)
+
+        self.itemTable = dict([(item.id, item) for item in [self.apple, self.banana, self.carrot]])
+
+        self.index = ItemIndex(self.itemTable)
+        self.index.addItems([self.apple, self.carrot])
+        self.index.addItem(self.banana)
+
+    def testTaggedAndUntaggedItems(self):
+        self.assertEqual(set([self.apple, self.banana]), set(self.index.taggedItems))
+        self.assertEqual(set([self.carrot]), set(self.index.untaggedItems))
+
+    def testItemsByContextValue(self):
+        self.assertEqual(set([self.apple, self.banana]), set(self.index.getItemsByContextValue('type', 'fruit')))
+        self.assertEqual(set([self.apple]), set(self.index.getItemsByContextValue('color', 'red')))
+
+    def testItemsByContext(self):
+        self.assertEqual(set([self.apple]), set(self.index.getItemsByContext('color')))
+
+    def testItemsByValueIgnoresContext(self):
+        self.assertEqual(set([self.banana]), set(self.index.getItemsByValue('yellow')))
+
+    def testUnknownTaggingsHaveNoItems(self):
+        self.assertEqual(0, len(self.index.getItemsByContextValue('type', 'vegetable')))
+        self.assertEqual(0, len(self.index.getItemsByContext('size')))
+        self.assertEqual(0, len(self.index.getItemsByValue('blue')))
+
+    def testContextsExcludeContextlessTags(self):
+        self.assertEqual(set(['type', 'color']), set(self.index.contexts))
+
+    def testTagsAreCollected(self):
+        self.assertEqual(set([Tag('fruit', 'type'), Tag('red', 'color'), Tag('yellow')]), self.index.tags)
+
+    def testRemovedItemIsNotIndexed(self):
+        self.index.removeItem(self.apple)
+
+        self.assertEqual(set([self.banana]), set(self.index.taggedItems))
+        self.assertEqual(set([self.banana]), set(self.index.getItemsByContextValue('type', 'fruit')))
+        self.assertEqual(0, len(self.index.getItemsByContext('color')))
+
+    def testTagsOfRemovedItemsAreDropped(self):
+        self.index.removeItem(self.apple)
+
+        self.assertEqual(set(['type']), set(self.index.contexts))
+        self.assertEqual(set([Tag('fruit', 'type'), Tag('yellow')]), self.index.tags)
+
+    def testItemWithChangedTagsIsRemovedByIndexedTags(self):
+        self.apple.tags = [Tag('vegetable', 'type'), ]
+
+        self.index.removeItem(self.apple)
+
+        self.assertEqual(set([self.banana]), set(self.index.getItemsByContextValue('type', 'fruit')))
+        self.assertEqual(0, len(self.index.getItemsByContext('color')))
+
+    def testCopyIsNotChangedByOriginal(self):
+        copy = self.index.copy()
+
+        self.index.removeItem(self.apple)
+
+        self.assertEqual(set([self.apple, self.banana]), set(copy.taggedItems))
+        self.assertEqual(set([self.apple]), set(copy.getItemsByContext('color')))
+        self.assertEqual(set(['type', 'color']), set(copy.contexts))
+
+    def testOriginalIsNotChangedByCopy(self):
+        copy = self.index.copy()
+
+        copy.removeItem(self.apple)
+
+        self.assertEqual(set([self.apple, self.banana]), set(self.index.taggedItems))
+        self.assertEqual(set([self.apple]), set(self.index.getItemsByContext('color')))
@@ -0,0 +1,90 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from tagfs.item_set import ItemSet, bitsFromIds, idsFromBits, bitLength
+
+class ItemMock(object):
+
+    def __init__(self, id):
+        self.id = id
+        self.name = str(id)
+
+class TestBitmapConversion(unittest.TestCase):
+
+    def testIdsSurviveRoundTrip(self):
+        ids = [0, 1, 7, 8, 63, 64, 1000]
+
+        self.assertEqual(ids, sorted(idsFromBits(bitsFromIds(ids))))
+
+    def testEmptyIds(self):
+        self.assertEqual(0, bitsFromIds([]))
+        self.assertEqual([], idsFromBits(0))
+
+    def testBitLength(self):
+        self.assertEqual(0, bitLength(0))
+        self.assertEqual(1, bitLength(1))
+        self.assertEqual(8, bitLength(255))
+        self.assertEqual(1001, bitLength(bitsFromIds([3, 1000])))
+
+class TestItemSet(unittest.TestCase):
+
+    def setUp(self):
+        self.itemTable = [ItemMock(i) for i in range(1000)]
+
+        # the small sets are stored sparse and the large ones dense
+        self.sparse = ItemSet.fromIds(self.itemTable, [1, 500, 999])
+        self.dense = ItemSet.fromIds(self.itemTable, range(0, 1000, 2))
+        self.otherDense = ItemSet.fromIds(self.itemTable, range(0, 1000, 3))
+
+    def assertIds(self, expectedIds, items):
+        self.assertEqual(set(expectedIds), set([item.id for item in items]))
+
+    def testRepresentation(self):
+        self.assertFalse(self.sparse.isDense)
+        self.assertTrue(self.dense.isDense)
+
+    def testIntersection(self):
+        self.assertIds(range(0, 1000, 6), self.dense & self.otherDense)
+        self.assertIds([500], self.dense & self.sparse)
+        self.assertIds([500], self.sparse & self.dense)
+
+    def testUnion(self):
+        self.assertIds(set(range(0, 1000, 2)) | set([1, 999]), self.dense | self.sparse)
+
+    def testDifference(self):
+        self.assertIds([1, 999], self.sparse - self.dense)
+        self.assertIds(set(range(0, 1000, 2)) - set([500]), self.dense - self.sparse)
+
+    def testIntersectionWithItemList(self):
+        self.assertIds([500], self.sparse.intersection([self.itemTable[500], self.itemTable[2]]))
+
+    def testCardinality(self):
+        self.assertEqual(3, len(self.sparse))
+        self.assertEqual(500, len(self.dense))
+        self.assertEqual(0, len(ItemSet(self.itemTable)))
+
+    def testContains(self):
+        self.assertTrue(self.itemTable[500] in self.sparse)
+        self.assertTrue(self.itemTable[500] in self.dense)
+        self.assertFalse(self.itemTable[501] in self.dense)
+
+    def testEqualSetsWithDifferentRepresentation(self):
+        self.assertEqual(ItemSet.fromIds(self.itemTable, [500]), self.sparse & self.dense)
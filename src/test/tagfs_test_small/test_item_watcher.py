@@ -0,0 +1,251 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from tagfs.item_watcher import ItemWatcher
+import systemMocks
+
+class WatchManagerMock(object):
+
+    def __init__(self):
+        # maps the watched paths to their masks
+        self.watches = {}
+        self.failingPaths = set()
+        self.wds = []
+
+    def add_watch(self, path, mask):
+        if path in self.failingPaths:
+            return {path: -1, }
+
+        self.watches[path] = mask
+        self.wds.append(path)
+
+        return {path: len(self.wds) - 1, }
+
+    def get_wd(self, path):
+        if not path in self.watches:
+            return None
+
+        return self.wds.index(path)
+
+    def rm_watch(self, wd, quiet = True):
+        del self.watches[self.wds[wd]]
+
+class NotifierMock(object):
+
+    def __init__(self, watchManager, default_proc_fun = None, timeout = None):
+        self.processEvent = default_proc_fun
+        self.events = []
+
+    def check_events(self):
+        return len(self.events) > 0
+
+    def read_events(self):
+        pass
+
+    def process_events(self):
+        events = self.events
+        self.events = []
+
+        for event in events:
+            self.processEvent(event)
+
+class PyinotifyMock(object):
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ONLYDIR = 0x01000000
+
+    Notifier = NotifierMock
+
+    def __init__(self, failingPaths = []):
+        self.failingPaths = set(failingPaths)
+
+    def WatchManager(self):
+        watchManager = WatchManagerMock()
+        watchManager.failingPaths = self.failingPaths
+
+        return watchManager
+
+class EventMock(object):
+
+    def __init__(self, path, name, mask):
+        self.path = path
+        self.name = name
+        self.mask = mask
+
+class ClockMock(object):
+
+    def __init__(self):
+        self.time = 1000
+
+    def __call__(self):
+        return self.time
+
+class OverflowEventMock(object):
+
+    def __init__(self):
+        self.mask = PyinotifyMock.IN_Q_OVERFLOW
+
+class ItemAccessMock(object):
+
+    def __init__(self, system, dataDirectory, itemNames):
+        self.system = system
+        self.dataDirectory = dataDirectory
+        self.tagFileName = '.tag'
+        self.items = dict([(itemName, None) for itemName in itemNames])
+        self.reloadedItemNames = []
+
+    def getItemDirectory(self, itemName):
+        return '%s/%s' % (self.dataDirectory, itemName, )
+
+    def reloadItems(self, itemNames):
+        self.reloadedItemNames.append(set(itemNames))
+
+class WhenItemsAreWatched(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemsAreWatched, self).setUp()
+
+        self.dataDirectory = '/path/to/my/data/directory'
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.system.directories.add(self.dataDirectory + '/apple')
+
+        self.itemAccess = ItemAccessMock(self.system, self.dataDirectory, ['apple', ])
+
+        self.itemWatcher = ItemWatcher(self.itemAccess, PyinotifyMock())
+
+    @property
+    def watchedPaths(self):
+        return set(self.itemWatcher.watchManager.watches.iterkeys())
+
+    def testThenDataDirectoryAndItemDirectoriesAreWatched(self):
+        self.assertEqual(set([self.dataDirectory, self.dataDirectory + '/apple', ]), self.watchedPaths)
+
+    def testThenWrittenTagFileChangesItem(self):
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory + '/apple', '.tag', PyinotifyMock.IN_CLOSE_WRITE))
+
+        self.assertEqual(set(['apple', ]), self.itemWatcher.changedItemNames)
+
+    def testThenOtherFilesInItemDirectoryAreIgnored(self):
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory + '/apple', 'photo.jpg', PyinotifyMock.IN_CLOSE_WRITE))
+
+        self.assertEqual(set(), self.itemWatcher.changedItemNames)
+
+    def testThenCreatedItemIsWatched(self):
+        self.system.directories.add(self.dataDirectory + '/banana')
+
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory, 'banana', PyinotifyMock.IN_CREATE))
+
+        self.assertEqual(set(['banana', ]), self.itemWatcher.changedItemNames)
+        self.assertTrue(self.dataDirectory + '/banana' in self.watchedPaths)
+
+    def testThenMovedAwayItemIsNotWatched(self):
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory, 'apple', PyinotifyMock.IN_MOVED_FROM))
+
+        self.assertEqual(set(['apple', ]), self.itemWatcher.changedItemNames)
+        self.assertFalse(self.dataDirectory + '/apple' in self.watchedPaths)
+
+    def testThenDeletedItemChangesItem(self):
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory, 'apple', PyinotifyMock.IN_DELETE))
+
+        self.assertEqual(set(['apple', ]), self.itemWatcher.changedItemNames)
+
+    def testThenConfigurationDirectoryIsIgnored(self):
+        self.itemWatcher._processEvent(EventMock(self.dataDirectory, '.tagfs', PyinotifyMock.IN_CREATE))
+
+        self.assertEqual(set(), self.itemWatcher.changedItemNames)
+
+    def testThenChangedItemsAreReloadedTogether(self):
+        self.itemWatcher.notifier.events = [
+            EventMock(self.dataDirectory + '/apple', '.tag', PyinotifyMock.IN_CLOSE_WRITE),
+            EventMock(self.dataDirectory, 'apple', PyinotifyMock.IN_MOVED_FROM),
+            EventMock(self.dataDirectory, 'pear', PyinotifyMock.IN_MOVED_TO),
+            ]
+
+        self.itemWatcher.processEvents()
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([set(['apple', 'pear', ]), ], self.itemAccess.reloadedItemNames)
+
+    def testThenAllItemsAreReloadedAfterOverflow(self):
+        self.itemAccess.items['carrot'] = None
+        self.system.directories.add(self.dataDirectory + '/banana')
+        self.system.directories.add(self.dataDirectory + '/.tagfs')
+
+        self.itemWatcher.notifier.events = [OverflowEventMock(), ]
+
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([set(['apple', 'banana', 'carrot', ]), ], self.itemAccess.reloadedItemNames)
+        self.assertTrue(self.dataDirectory + '/banana' in self.watchedPaths)
+
+class WhenItemCanNotBeWatched(unittest.TestCase):
+
+    def setUp(self):
+        super(WhenItemCanNotBeWatched, self).setUp()
+
+        self.dataDirectory = '/path/to/my/data/directory'
+        self.tagFileName = self.dataDirectory + '/apple/.tag'
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.system.directories.add(self.dataDirectory + '/apple')
+        self.system.readFiles[self.tagFileName] = systemMocks.ReadLineFileMock(['fruit', ])
+        self.system.stats[self.tagFileName] = systemMocks.StatMock(st_mtime = 1)
+
+        self.itemAccess = ItemAccessMock(self.system, self.dataDirectory, ['apple', ])
+        self.clock = ClockMock()
+
+        self.itemWatcher = ItemWatcher(self.itemAccess, PyinotifyMock([self.dataDirectory + '/apple', ]), pollInterval = 10, now = self.clock)
+
+    def testThenItemIsPolled(self):
+        self.assertEqual(set(['apple', ]), set(self.itemWatcher.polledItems.iterkeys()))
+
+    def testThenChangedTagFileIsReloadedAfterPollInterval(self):
+        self.system.stats[self.tagFileName] = systemMocks.StatMock(st_mtime = 2)
+
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([], self.itemAccess.reloadedItemNames)
+
+        self.clock.time += 10
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([set(['apple', ]), ], self.itemAccess.reloadedItemNames)
+
+    def testThenUnchangedTagFileIsNotReloaded(self):
+        self.clock.time += 10
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([], self.itemAccess.reloadedItemNames)
+
+    def testThenDeletedItemIsReloadedAndNotPolledAnymore(self):
+        self.system.directories.discard(self.dataDirectory + '/apple')
+
+        self.clock.time += 10
+        self.itemWatcher.processEvents()
+
+        self.assertEqual([set(['apple', ]), ], self.itemAccess.reloadedItemNames)
+        self.assertEqual({}, self.itemWatcher.polledItems)
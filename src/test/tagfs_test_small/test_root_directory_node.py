@@ -31,6 +31,14 @@ class ConfigMock(object):
     def enableValueFilters(self):
         return False
 
+    @property
+    def enableRecursionPruning(self):
+        return False
+
+    @property
+    def maxFilterDepth(self):
+        return 0
+
     @property
     def enableRootItemLinks(self):
         return True
@@ -0,0 +1,48 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+
+from unittest import TestCase
+
+from tagfs import cache
+from tagfs.node_statistics import StatisticsFileNode
+
+class TestStatisticsFileNode(TestCase):
+
+    def setUp(self):
+        self.statistics = cache.getStatistics('tagfs_test_small.test_statistics_file_node')
+        self.node = StatisticsFileNode()
+
+    def testSizeIsZero(self):
+        self.assertEqual(0, self.node.attr.st_size)
+
+    def testHandleIsReadDirectly(self):
+        self.assertTrue(self.node.open('/.statistics', 0).direct_io)
+
+    def testHandleKeepsContentOfOpen(self):
+        handle = self.node.open('/.statistics', 0)
+        content = handle.read(100000, 0)
+
+        self.statistics.hits += 1
+
+        self.assertEqual(content, handle.read(100000, 0))
+        self.assertNotEqual(content, self.node.content)
+
+    def testHandleIsReadAtOffset(self):
+        handle = self.node.open('/.statistics', 0)
+
+        self.assertEqual(handle.content[4:8], handle.read(4, 4))
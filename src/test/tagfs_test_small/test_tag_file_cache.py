@@ -0,0 +1,101 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tagfs import sysIO
+import tagfs.item_access as item_access
+from tagfs.tag_file_cache import TagFileCache
+import systemMocks
+
+class ParseTagsFromFileCounter(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, system, tagFileName):
+        self.calls += 1
+
+        return item_access.parseTagsFromFile(system, tagFileName)
+
+class TestTagFileCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestTagFileCache, self).setUp()
+
+        self.system = systemMocks.SystemMock(self, {})
+        self.system.readFiles['item/.tag'] = systemMocks.ReadLineFileMock(['context: value', ])
+        self.system.stats['item/.tag'] = systemMocks.StatMock(st_mtime = 1, st_size = 15, st_ino = 42)
+
+        self.parseTagsFromFile = ParseTagsFromFileCounter()
+        self.cache = TagFileCache(self.system, 'index', self.parseTagsFromFile)
+
+    def testUnchangedTagFileIsParsedOnce(self):
+        self.assertEqual(set([item_access.Tag('value', 'context'), ]), self.cache.parseTagsFromFile(self.system, 'item/.tag'))
+        self.assertEqual(set([item_access.Tag('value', 'context'), ]), self.cache.parseTagsFromFile(self.system, 'item/.tag'))
+
+        self.assertEqual(1, self.parseTagsFromFile.calls)
+
+    def testModifiedTagFileIsParsedAgain(self):
+        self.cache.parseTagsFromFile(self.system, 'item/.tag')
+
+        self.system.stats['item/.tag'] = systemMocks.StatMock(st_mtime = 2, st_size = 15, st_ino = 42)
+        self.cache.parseTagsFromFile(self.system, 'item/.tag')
+
+        self.assertEqual(2, self.parseTagsFromFile.calls)
+
+    def testGivenTagFileStatIsNotStatedAgain(self):
+        self.cache.parseTagsFromFile(self.system, 'item/.tag', systemMocks.StatMock(st_mtime = 2, st_size = 15, st_ino = 42))
+
+        self.assertEqual([], self.system.statedPaths)
+        self.assertEqual((2, 15, 42), self.cache.cachedTagFiles['item/.tag'][0])
+
+class TestTagFileCachePersistence(unittest.TestCase):
+
+    def setUp(self):
+        super(TestTagFileCachePersistence, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.tagFileName = os.path.join(self.directory, '.tag')
+        self.cacheFileName = os.path.join(self.directory, 'index')
+
+        with open(self.tagFileName, 'w') as f:
+            f.write('context: value\n')
+
+        self.system = sysIO.createSystem()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+        super(TestTagFileCachePersistence, self).tearDown()
+
+    def testSavedTagFilesAreNotParsedAfterLoad(self):
+        cache = TagFileCache(self.system, self.cacheFileName)
+        cache.parseTagsFromFile(self.system, self.tagFileName)
+        cache.save()
+
+        parseTagsFromFile = ParseTagsFromFileCounter()
+        cache = TagFileCache(self.system, self.cacheFileName, parseTagsFromFile)
+        cache.load()
+
+        self.assertEqual(set([item_access.Tag('value', 'context'), ]), cache.parseTagsFromFile(self.system, self.tagFileName))
+        self.assertEqual(0, parseTagsFromFile.calls)
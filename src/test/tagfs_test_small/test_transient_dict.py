@@ -18,7 +18,7 @@
 #
 
 import unittest
-from tagfs.transient_dict import TransientDict
+from tagfs.transient_dict import TransientDict, SynchronizedTransientDict
 
 class TestTransientDict(unittest.TestCase):
     
@@ -50,3 +50,72 @@ class TestTransientDict(unittest.TestCase):
         self.assertTrue('1' in d)
         self.assertTrue('2' not in d)
         self.assertTrue('4' in d)
+
+    def testDictWithoutCapacityStoresNothing(self):
+        for capacity in [0, -1]:
+            d = TransientDict(capacity)
+
+            d['1'] = 'a'
+
+            self.assertTrue('1' not in d)
+            self.assertEqual(None, d.get('1'))
+            self.assertEqual(0, len(d))
+
+    def testReadingValueMarksItAsRecentlyUsed(self):
+        d = TransientDict(2)
+
+        d['1'] = 'a'
+        d['2'] = 'b'
+        d['1']
+        d['3'] = 'c'
+
+        self.assertTrue('1' in d)
+        self.assertTrue('2' not in d)
+        self.assertEqual(2, len(d))
+
+    def testItemsAreOrderedByUsage(self):
+        d = TransientDict(3)
+
+        d['1'] = 'a'
+        d['2'] = 'b'
+        d['3'] = 'c'
+        d['1']
+
+        self.assertEqual([('2', 'b'), ('3', 'c'), ('1', 'a'), ], d.items())
+
+    def testStatisticsCountHitsMissesAndEvictions(self):
+        d = TransientDict(2)
+
+        d['1'] = 'a'
+        d['2'] = 'b'
+        d['3'] = 'c'
+        d['4'] = 'd'
+
+        self.assertEqual('d', d.get('4'))
+        self.assertEqual(None, d.get('5'))
+
+        self.assertEqual(1, d.statistics.hits)
+        self.assertEqual(1, d.statistics.misses)
+        self.assertEqual(4 - d.statistics.entries, d.statistics.evictions)
+
+    def testLookupIsNotCounted(self):
+        d = TransientDict(2)
+
+        d['1'] = 'a'
+
+        self.assertEqual('a', d.lookup('1'))
+        self.assertEqual(None, d.lookup('2'))
+
+        self.assertEqual(0, d.statistics.hits)
+        self.assertEqual(0, d.statistics.misses)
+
+    def testSynchronizedDictForgetsValues(self):
+        d = SynchronizedTransientDict(2)
+
+        d['1'] = 'a'
+        d['2'] = 'b'
+        d.lookup('1')
+        d['3'] = 'c'
+
+        self.assertEqual('a', d.get('1'))
+        self.assertTrue('2' not in d)
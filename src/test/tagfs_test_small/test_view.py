@@ -0,0 +1,204 @@
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import errno
+import stat
+from unittest import TestCase
+
+from tagfs.item_access import Tag
+from tagfs.view import View
+
+from tagfs_test.item_access_mock import ItemAccessMock
+from tagfs_test.item_mock import ItemMock
+
+class TaggedItemMock(ItemMock):
+
+    def __init__(self, name, *contextValues):
+        super(TaggedItemMock, self).__init__(name, [Tag(value, context) for context, value in contextValues])
+
+    @property
+    def values(self):
+        return [t.value for t in self.tags]
+
+    def getTagsByContext(self, context):
+        return [t for t in self.tags if t.context == context]
+
+class ConfigMock(object):
+
+    enableValueFilters = False
+
+    enableRootItemLinks = False
+
+    pathCacheSize = 10
+
+    missingPathCacheSize = 10
+
+    enableMultithreading = False
+
+    enableRecursionPruning = False
+
+    maxFilterDepth = 0
+
+class PruningConfigMock(ConfigMock):
+
+    enableRecursionPruning = True
+
+    maxFilterDepth = 2
+
+class TestView(TestCase):
+
+    def setUp(self):
+        self.itemAccess = ItemAccessMock()
+        self.itemAccess.taggedItems = [TaggedItemMock('apple', ('type', 'fruit'), ('color', 'red')), TaggedItemMock('banana', ('type', 'fruit'), ('color', 'yellow')), TaggedItemMock('cherry', ('type', 'berry'), ('color', 'red')), TaggedItemMock('stone', ('type', 'mineral')), ]
+
+        self.view = View(self.itemAccess, ConfigMock())
+
+    def testExistingPathIsResolved(self):
+        self.assertEqual('fruit', self.view.getNode('/type/fruit').value)
+
+    def testMissingPathIsNone(self):
+        self.assertEqual(None, self.view.getNode('/type/vegetable'))
+
+    def testMissingPathIsRemembered(self):
+        self.view.getNode('/type/vegetable')
+
+        self.assertEqual(None, self.view.getNode('/type/vegetable'))
+        self.assertTrue('/type/vegetable' in self.view._missingPathCache)
+
+    def testMissingPathsAreForgottenWhenItemsChange(self):
+        self.view.getNode('/type/vegetable')
+
+        self.itemAccess.taggedItems = self.itemAccess._taggedItems + [TaggedItemMock('carrot', ('type', 'vegetable')), ]
+        self.itemAccess.generation += 1
+
+        self.assertEqual('vegetable', self.view.getNode('/type/vegetable').value)
+
+    def testPathIsResolvedFromCachedAncestor(self):
+        child = object()
+
+        class NodeMock(object):
+
+            entries = {'child': child, }
+
+        # the ancestor is not reachable from the root node
+        self.view._entryCache['/virtual'] = NodeMock()
+
+        self.assertTrue(self.view.getNode('/virtual/child') is child)
+
+    def testPathBelowMissingPathIsMissing(self):
+        self.view.getNode('/type/vegetable')
+
+        self.assertEqual(None, self.view.getNode('/type/vegetable/.git'))
+
+    def testReaddirListsEntriesInStableOrder(self):
+        names = [e.name for e in self.view.readdir('/type', 0)]
+
+        self.assertEqual(sorted(names), names)
+        self.assertTrue('fruit' in names)
+
+    def testReaddirContinuesAtOffset(self):
+        entries = list(self.view.readdir('/type', 0))
+
+        self.assertEqual([e.name for e in entries[1:]], [e.name for e in self.view.readdir('/type', entries[0].offset)])
+
+    def testReaddirOfMissingPathFails(self):
+        self.assertEqual(-errno.ENOENT, self.view.readdir('/type/vegetable', 0))
+
+    def testReaddirReturnsEntryTypes(self):
+        types = dict([(e.name, e.type) for e in self.view.readdir('/', 0)])
+
+        self.assertEqual(stat.S_IFDIR, types['type'])
+
+    def testReaddirPutsListedNodesIntoPathCache(self):
+        list(self.view.readdir('/type', 0))
+
+        self.assertTrue('/type/fruit' in self.view._entryCache)
+
+    def testReaddirDoesNotPutEntriesOfLargeDirectoriesIntoPathCache(self):
+        class SmallPathCacheConfigMock(ConfigMock):
+
+            pathCacheSize = 4
+
+        view = View(self.itemAccess, SmallPathCacheConfigMock())
+
+        list(view.readdir('/type', 0))
+
+        self.assertFalse('/type/fruit' in view._entryCache)
+        self.assertTrue('/type' in view._entryCache)
+
+    def testReaddirDoesNotPutNodesIntoCacheOfNewItems(self):
+        direntries = self.view.readdir('/type', 0)
+
+        self.itemAccess.generation += 1
+        self.view.getNode('/')
+
+        list(direntries)
+
+        self.assertFalse('/type/fruit' in self.view._entryCache)
+
+    def testReadUsesOpenedHandle(self):
+        class FileHandleMock(object):
+
+            def read(self, size, offset):
+                return 'content'[offset:offset + size]
+
+        self.assertEqual('nt', self.view.read('/missing', 2, 2, FileHandleMock()))
+
+    def testInodesAreStableAfterRemount(self):
+        view = View(self.itemAccess, ConfigMock())
+
+        for path in ['/type', '/type/fruit', '/type/fruit/apple', '/.untagged', ]:
+            ino = self.view.getattr(path).st_ino
+
+            self.assertTrue(ino > 1)
+            self.assertEqual(ino, view.getattr(path).st_ino)
+
+    def testInodesOfDifferentNodesDiffer(self):
+        self.assertNotEqual(self.view.getattr('/type/fruit').st_ino, self.view.getattr('/type/mineral').st_ino)
+
+    def testFilterOrderDoesNotChangeInode(self):
+        self.assertEqual(self.view.getattr('/type/fruit/color/red').st_ino, self.view.getattr('/color/red/type/fruit').st_ino)
+
+    def testReaddirReturnsInodes(self):
+        inodes = dict([(e.name, e.ino) for e in self.view.readdir('/type', 0)])
+
+        self.assertEqual(self.view.getattr('/type/fruit').st_ino, inodes['fruit'])
+
+class TestViewWithRecursionPruning(TestCase):
+
+    def setUp(self):
+        self.itemAccess = ItemAccessMock()
+        self.itemAccess.taggedItems = [TaggedItemMock('apple', ('type', 'fruit'), ('color', 'red'), ('color', 'green')), TaggedItemMock('banana', ('type', 'fruit'), ('color', 'yellow')), TaggedItemMock('cherry', ('type', 'berry'), ('color', 'red')), ]
+
+    def getEntryNames(self, config, path):
+        return View(self.itemAccess, config).getNode(path).entries.keys()
+
+    def testAppliedContextIsListedWithoutPruning(self):
+        self.assertTrue('color' in self.getEntryNames(ConfigMock(), '/color/red'))
+
+    def testAppliedContextIsHidden(self):
+        names = self.getEntryNames(PruningConfigMock(), '/color/red')
+
+        self.assertFalse('color' in names)
+        self.assertTrue('type' in names)
+
+    def testFiltersEndAtMaxFilterDepth(self):
+        names = self.getEntryNames(PruningConfigMock(), '/color/red/type/fruit')
+
+        self.assertEqual(set(['.export', 'apple']), set(names))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+#
+# Copyright 2013 Markus Pielmeier
+#
+# This file is part of tagfs.
+#
+# tagfs is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# tagfs is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with tagfs.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""Compares the path cache's LRU TransientDict with the former sort based
+implementation.
+
+The workloads simulate View.getNode lookups: each path is looked up and
+stored on a miss.
+
+Usage: benchmark_transient_dict.py [capacity] [paths] [lookups]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'modules'))
+
+from tagfs.transient_dict import TransientDict
+
+class SortingTransientDict(object):
+    """The TransientDict implementation before it was replaced by an LRU.
+    """
+
+    class Version(object):
+        
+        def __init__(self, key):
+            self.key = key
+
+        def touch(self, version):
+            self.version = version
+
+    class Value(object):
+        
+        def __init__(self, value, version):
+            self.value = value
+            self.version = version
+
+    def __init__(self, averageCapacity):
+        self.averageCapacity = averageCapacity
+        self.nextVersion = 0
+        self.setCounter = 0
+        self.data = {}
+        self.versions = []
+    
+    def __getitem__(self, k):
+        v = self.data[k]
+
+        if not v:
+            return None
+
+        v.version.touch(self.nextVersion)
+        self.nextVersion += 1
+
+        return v.value
+
+    def _cleanUpCache(self):
+        if len(self.data) < self.averageCapacity:
+            return
+
+        def versionCmp(a, b):
+            if a.version < b.version:
+                return 1
+            if b.version < a.version:
+                return -1
+
+            return 0
+
+        self.versions.sort(versionCmp)
+
+        while len(self.versions) > self.averageCapacity:
+            version = self.versions.pop()
+
+            self.data.pop(version.key)
+
+    def __setitem__(self, k, v):
+        if k in self.data:
+            value = self.data[k]
+
+            value.value = v
+        else:
+            self.setCounter += 1
+            if self.setCounter % self.averageCapacity == 0:
+                self._cleanUpCache()
+
+            version = SortingTransientDict.Version(k)
+            self.versions.append(version)
+
+            value = SortingTransientDict.Value(v, version)
+            self.data[k] = value
+
+        value.version.touch(self.nextVersion)
+        self.nextVersion += 1
+
+    def __contains__(self, k):
+        return k in self.data
+
+def createSkewedWorkload(pathCount, lookupCount):
+    """Few hot paths and a long tail of rarely used paths.
+    """
+
+    r = random.Random(42)
+    paths = ['/path/%s' % i for i in xrange(pathCount)]
+
+    return [paths[min(int(r.paretovariate(0.8)) - 1, pathCount - 1)] for i in xrange(lookupCount)]
+
+def createListingWorkload(pathCount, lookupCount):
+    """Lists random directories and stats each of their children like a file
+    manager which browses the tree.
+    """
+
+    r = random.Random(42)
+    childCount = 50
+    directoryCount = max(1, pathCount / childCount)
+
+    workload = []
+    while len(workload) < lookupCount:
+        directory = '/dir/%s' % r.randint(0, directoryCount - 1)
+
+        workload.append(directory)
+
+        for i in xrange(childCount):
+            workload.append('%s/%s' % (directory, i))
+            workload.append(directory)
+
+    return workload[:lookupCount]
+
+def run(d, workload):
+    hits = 0
+
+    start = time.time()
+
+    for path in workload:
+        if path in d:
+            d[path]
+
+            hits += 1
+        else:
+            d[path] = path
+
+    return time.time() - start, hits
+
+def main():
+    capacity = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    pathCount = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    lookupCount = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+
+    print 'capacity %s, %s paths, %s lookups' % (capacity, pathCount, lookupCount)
+
+    for workloadName, createWorkload in [('skewed', createSkewedWorkload), ('listing', createListingWorkload), ]:
+        workload = createWorkload(pathCount, lookupCount)
+
+        for name, d in [('sorting', SortingTransientDict(capacity)), ('lru', TransientDict(capacity)), ]:
+            duration, hits = run(d, workload)
+
+            print '%-8s %-8s %8.3fs %6.1f%% hits %8.2fus/lookup' % (workloadName, name, duration, 100.0 * hits / lookupCount, 1000000.0 * duration / lookupCount)
+
+if __name__ == '__main__':
+    main()